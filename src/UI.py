@@ -1,5 +1,6 @@
 from directedGraph import *
-from random import randint
+from graphIO import *
+from graphGenerators import gnm_graph
 from math import inf
 
 
@@ -30,8 +31,12 @@ class UI:
             "19": self.parse_all_neighbors,
             "20": self.lowest_cost_walk,
             "21": self.is_graph_DAG,
-            "22": self.get_lowest_cost_path_neg_cycles
+            "22": self.get_lowest_cost_path_neg_cycles,
+            "23": self.write_graph_to_binary_file_ui,
+            "24": self.print_last_run_statistics
         }
+        # the algorithm runs of these options are instrumented, so option 24 can show what they cost
+        self.__instrumented_options = {"20", "21", "22"}
 
     @staticmethod
     def print_menu():
@@ -60,55 +65,39 @@ class UI:
         print("    >> Press 21 to verify if the corresponding graph is a DAG and perform a topological sorting of the activities"
               " using the algorithm based on depth-first traversal (Tarjan's algorithm). If it is a DAG, finds a highest cost path between two given vertices, in O(m+n).")
         print("    >> Press 22 to find a minimum cost path between 2 given vertices (negative cost cycles may exist in the graph)")
+        print("    >> Press 23 to write the graph to a new binary file")
+        print("    >> Press 24 to display the statistics of the algorithms run by the last command")
         print("    >> Press 0 to exit")
         print("-" * 75)
 
     def load_graph_from_file(self):
-        try:
-            f = open(self.__file, "rt")
-            first = f.readline()
-            first = first.strip()
-            first = first.split(sep=" ", maxsplit=1)
-            number_of_vertices, number_of_edges = int(first[0]), int(first[1])
-            self.__graph = DirectedGraph(number_of_vertices)
-            lines = f.readlines()
-            for line in lines:
-                line = line.strip()
-                if len(line) > 0:
-                    line = line.split(sep=" ", maxsplit=2)
-                    start_vertex, end_vertex, cost = int(line[0]), int(line[1]), int(line[2])
-                    self.__graph.add_edge(start_vertex, end_vertex, cost)
-
-            f.close()
-            print("Graph loaded successfully!\n")
-        except IOError:
-            raise GraphException("Error reading input file!\n")
+        if is_binary_graph_file(self.__file):
+            self.__graph = DirectedGraph.from_frozen(load_binary_graph(self.__file))
+        else:
+            self.__graph = load_text_graph(self.__file)
+        print("Graph loaded successfully!\n")
 
     @staticmethod
     def write_graph_to_file(graph):
         file = input("Input the name of the file where you want to save the graph > ")
-        f = open(file, "wt")
-        first = str(graph.get_no_of_vertices) + " " + str(graph.get_no_of_edges) + "\n"
-        f.write(first)
-
         if int(graph.get_no_of_vertices) == 0 and int(graph.get_no_of_edges) == 0:
             raise GraphException("Nothing can be written to the file!\n")
 
-        for edge in graph.get_costs.keys():
-            line = str(edge[0]) + " " + str(edge[1]) + " " + str(graph.get_costs[edge]) + "\n"
-            f.write(line)
-
-        for vertex in graph.parse_dictionary_keys():
-            if len(graph.get_in_neighbors[vertex]) == 0 and len(graph.get_out_neighbors[vertex]) == 0:
-                line = str(vertex) + "\n"
-                f.write(line)
-
-        f.close()
+        write_text_graph(graph, file)
         print("Graph written to file successfully!\n")
 
     def write_graph_to_file_ui(self):
         self.write_graph_to_file(self.__graph)
 
+    @staticmethod
+    def write_graph_to_binary_file(graph):
+        file = input("Input the name of the binary file where you want to save the graph > ")
+        save_binary_graph(graph, file)
+        print("Graph written to binary file successfully!\n")
+
+    def write_graph_to_binary_file_ui(self):
+        self.write_graph_to_binary_file(self.__graph)
+
     def print_number_of_vertices(self):
         print("Number of vertices is " + str(self.__graph.get_no_of_vertices))
 
@@ -260,10 +249,10 @@ class UI:
         end_vertex = input("Input end vertex: ")
         start_vertex = self.validator_vertex(start_vertex)
         end_vertex = self.validator_vertex(end_vertex)
-        if start_vertex not in self.__graph.parse_dictionary_keys():
+        if not self.__graph.is_vertex(start_vertex):
             raise GraphException("Start vertex does not exist in the graph!")
 
-        if end_vertex not in self.__graph.parse_dictionary_keys():
+        if not self.__graph.is_vertex(end_vertex):
             raise GraphException("End vertex does not exist in the graph!")
 
         path, distance = self.__graph.get_lowest_cost_path(start_vertex, end_vertex)
@@ -272,14 +261,16 @@ class UI:
         print(path)
 
     def is_graph_DAG(self):
-        dag_sorted = self.__graph.DAG()
-        if dag_sorted:
+        is_dag, vertices = self.__graph.topological_sort()
+        if is_dag:
             print("Given graph is DAG!")
             print("Topological sorting with DFS:")
-            print(dag_sorted)
-            self.get_highest_cost_path(dag_sorted)
+            print(vertices)
+            self.get_highest_cost_path(vertices)
         else:
             print("Given graph is not DAG!")
+            print("Cycle found:")
+            print(vertices)
 
     def get_highest_cost_path(self, sorted_dag):
         print("Input start vertex of highest cost path: ")
@@ -304,39 +295,39 @@ class UI:
         path.reverse()
         print(path)
 
+    def print_last_run_statistics(self):
+        runs = self.__graph.get_instrumentation.get_runs
+        if len(runs) == 0:
+            print("No algorithm was run by the last instrumented command!\n")
+            return
+        for stats in runs:
+            print(stats)
+
     def get_lowest_cost_path_neg_cycles(self):
         start_vertex = int(input("Vertex 1: "))
         end_vertex = int(input("Vertex 2: "))
-        max_length = 2 * self.__graph.get_no_of_vertices
-        distances = self.__graph.bellman_ford(start_vertex, max_length)
-
-        for vertex1 in self.__graph.parse_dictionary_keys():
-            for vertex2 in self.__graph.parse_outbound_neighbors(vertex1):
-                if vertex2 in distances[vertex1].keys() and distances[vertex1][vertex1] + self.__graph.get_cost_of_edge(vertex1, vertex2) < distances[vertex2][vertex2]:
-                    print("Graph has negative cycles!")
-                    return
-
-        tuplee = (999999999, 999999999)
-        for vertex1 in range(max_length + 1):
-            if end_vertex in distances[vertex1]:
-                if tuplee[1] > distances[vertex1][end_vertex]:
-                    tuplee = (self.__graph.min_cost_path_neg_cycle(distances, start_vertex, end_vertex, vertex1), distances[vertex1][end_vertex])
-        print(tuplee[0], " with cost:", tuplee[1])
+        if not self.__graph.is_vertex(end_vertex):
+            raise GraphException("End vertex does not exist in the graph!")
+        distances, prev, cycle = self.__graph.spfa(start_vertex)
+
+        if cycle is not None:
+            print("Graph has negative cycles!")
+            print("Negative cost cycle:", cycle)
+            return
+
+        if end_vertex not in distances:
+            print("No path!")
+            return
+
+        path = [end_vertex]
+        while path[-1] != start_vertex:
+            path.append(prev[path[-1]])
+        path.reverse()
+        print(path, " with cost:", distances[end_vertex])
 
     @staticmethod
     def generateGraph(no_of_vertices, no_of_edges):
-        graph = DirectedGraph(no_of_vertices)
-        index = 0
-        while index < no_of_edges:
-            start_vertex = randint(0, no_of_vertices - 1)
-            end_vertex = randint(0, no_of_vertices - 1)
-            cost = randint(0, 200)
-            try:
-                graph.add_edge(start_vertex, end_vertex, cost)
-                index += 1
-            except GraphException:
-                pass
-        return graph
+        return gnm_graph(no_of_vertices, no_of_edges)
 
     def generate_random_graph(self):
         no_of_vertices = input("Input the number of vertices: ")
@@ -415,8 +406,12 @@ class UI:
                 return
             elif user_command in self.__dict_of_options:
                 try:
-                    self.__dict_of_options[user_command]()
+                    if user_command in self.__instrumented_options:
+                        with self.__graph.instrumented():
+                            self.__dict_of_options[user_command]()
+                    else:
+                        self.__dict_of_options[user_command]()
                 except GraphException as err:
                     print(err)
             else:
-                print("Invalid command! Must be an integer between 0 and 22!\n")
+                print("Invalid command! Must be an integer between 0 and 24!\n")
@@ -0,0 +1,203 @@
+from exceptions import *
+from frozenGraph import FrozenDirectedGraph
+from sharedGraph import SharedGraph
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+from math import inf
+import mmap
+import os
+
+# number of source vertices computed by a worker task
+SOURCES_PER_TASK = 64
+
+# (out_offsets, out_targets, reweighted costs, potentials) of a worker process, set once by the pool initializer
+worker_state = None
+# SharedGraph the worker state of a worker process is a view of
+worker_shared_graph = None
+
+
+class DistanceMatrix:
+    """
+    Dense n x n matrix of lowest walk costs, stored row by row in a flat array of doubles (inf for no walk).
+    The matrix can be kept in memory or in a memory-mapped file.
+    """
+    def __init__(self, frozen_graph, file_name=None):
+        self.__graph = frozen_graph
+        self.__size = frozen_graph.get_no_of_vertices
+        if file_name is None:
+            self.__values = array("d", [inf]) * (self.__size * self.__size)
+            return
+        try:
+            with open(file_name, "w+b") as f:
+                f.truncate(max(8 * self.__size * self.__size, 1))
+                self.__values = memoryview(mmap.mmap(f.fileno(), 0)).cast("B")[:8 * self.__size * self.__size].cast("d")
+        except IOError:
+            raise GraphException("Error writing distance matrix file!\n")
+        row = array("d", [inf]) * self.__size
+        for slot in range(self.__size):
+            self.set_row(slot, row)
+
+    @property
+    def get_size(self):
+        """
+        :return: number of rows (and columns) of the matrix
+        """
+        return self.__size
+
+    @property
+    def get_values(self):
+        """
+        :return: flat array with the rows of the matrix
+        """
+        return self.__values
+
+    def set_row(self, slot, row):
+        """
+        Replaces the row of the vertex in the given slot
+        """
+        self.__values[slot * self.__size:(slot + 1) * self.__size] = row
+
+    def get_row(self, vertex):
+        """
+        :return: dictionary with the cost of the lowest cost walk from the given vertex to every vertex it reaches
+        :raises GraphException if vertex is invalid
+        """
+        slot = self.__graph.index_of(vertex)
+        row = self.__values[slot * self.__size:(slot + 1) * self.__size]
+        return {self.__graph.vertex_at(end_slot): cost for end_slot, cost in enumerate(row) if cost != inf}
+
+    def get_distance(self, start_vertex, end_vertex):
+        """
+        :return: the cost of the lowest cost walk from start_vertex to end_vertex, inf if there is no walk
+        :raises GraphException if a vertex is invalid
+        """
+        return self.__values[self.__graph.index_of(start_vertex) * self.__size + self.__graph.index_of(end_vertex)]
+
+
+def johnson_potentials(frozen_graph):
+    """
+    Bellman Ford algorithm from a virtual source linked with 0 cost edges to every vertex
+    :return: list with the potential of every slot, such that cost(u, v) + h(u) - h(v) >= 0 for every edge
+    :raises GraphException if the graph has a negative cost cycle
+    """
+    offsets = frozen_graph.get_out_offsets
+    targets = frozen_graph.get_out_targets
+    costs = frozen_graph.get_out_costs
+    number_of_vertices = frozen_graph.get_no_of_vertices
+    potentials = [0] * number_of_vertices
+    queue = range(number_of_vertices)
+    for k in range(number_of_vertices + 1):
+        changed = {}
+        for slot in queue:
+            potential = potentials[slot]
+            for position in range(offsets[slot], offsets[slot + 1]):
+                neighbor = targets[position]
+                if potential + costs[position] < potentials[neighbor]:
+                    potentials[neighbor] = potential + costs[position]
+                    changed[neighbor] = None
+        if not changed:
+            return potentials
+        queue = changed
+
+    raise GraphException("Graph has negative cycles!\n")
+
+
+def reweighted_distances(offsets, targets, costs, potentials, source):
+    """
+    Dijkstra algorithm from source over the reweighted (non-negative) costs
+    :return: array with the original cost of the lowest cost walk from source to every slot, inf for no walk
+    """
+    number_of_vertices = len(potentials)
+    dist = array("d", [inf]) * number_of_vertices
+    dist[source] = 0
+    heap = [(0, source)]
+    while heap:
+        distance, slot = heappop(heap)
+        if distance > dist[slot]:
+            continue
+        for position in range(offsets[slot], offsets[slot + 1]):
+            neighbor = targets[position]
+            new_distance = distance + costs[position]
+            if new_distance < dist[neighbor]:
+                dist[neighbor] = new_distance
+                heappush(heap, (new_distance, neighbor))
+
+    # undo the reweighting: d(u, v) = d'(u, v) - h(u) + h(v)
+    source_potential = potentials[source]
+    for slot in range(number_of_vertices):
+        if dist[slot] != inf:
+            dist[slot] += potentials[slot] - source_potential
+    return dist
+
+
+def init_worker(shared_graph_name, potentials):
+    """
+    Pool initializer: attaches the worker process to the shared reweighted graph for all the tasks it runs
+    """
+    global worker_state, worker_shared_graph
+    worker_shared_graph = SharedGraph.attach(shared_graph_name)
+    graph = worker_shared_graph.get_graph
+    worker_state = (graph.get_out_offsets, graph.get_out_targets, graph.get_out_costs, potentials)
+
+
+def worker_rows(sources):
+    """
+    Task run in a worker process: computes the rows of the given source slots
+    :return: list of (source, row) tuples
+    """
+    offsets, targets, costs, potentials = worker_state
+    return [(source, reweighted_distances(offsets, targets, costs, potentials, source)) for source in sources]
+
+
+def johnson_all_pairs(graph, max_workers=None, file_name=None):
+    """
+    Johnson's algorithm: the costs are made non-negative once with the Bellman Ford potentials, then a Dijkstra
+    search is run from every vertex; the searches are spread over a process pool
+    :param graph: DirectedGraph or FrozenDirectedGraph, with no negative cost cycles
+    :param max_workers: number of worker processes, by default the number of CPUs; 1 runs everything in this process
+    :param file_name: if given, the distance matrix is stored in this memory-mapped file instead of memory
+    :return: DistanceMatrix with the cost of the lowest cost walk between every 2 vertices
+    :raises GraphException if the graph has a negative cost cycle
+    """
+    frozen_graph = graph if isinstance(graph, FrozenDirectedGraph) else graph.freeze()
+    potentials = johnson_potentials(frozen_graph)
+    offsets = frozen_graph.get_out_offsets
+    targets = frozen_graph.get_out_targets
+    sources = frozen_graph.get_out_costs
+    costs = array("d", [0]) * len(targets)
+    for slot in range(frozen_graph.get_no_of_vertices):
+        for position in range(offsets[slot], offsets[slot + 1]):
+            costs[position] = sources[position] + potentials[slot] - potentials[targets[position]]
+
+    matrix = DistanceMatrix(frozen_graph, file_name)
+    number_of_vertices = frozen_graph.get_no_of_vertices
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1 or number_of_vertices <= SOURCES_PER_TASK:
+        for source in range(number_of_vertices):
+            matrix.set_row(source, reweighted_distances(offsets, targets, costs, potentials, source))
+        return matrix
+
+    # the inbound costs are reweighted too, so that the shared snapshot is a consistent graph
+    in_offsets = frozen_graph.get_in_offsets
+    in_sources = frozen_graph.get_in_sources
+    original_in_costs = frozen_graph.get_in_costs
+    in_costs = array("d", [0]) * len(in_sources)
+    for slot in range(number_of_vertices):
+        for position in range(in_offsets[slot], in_offsets[slot + 1]):
+            in_costs[position] = original_in_costs[position] + potentials[in_sources[position]] - potentials[slot]
+    reweighted_graph = FrozenDirectedGraph(frozen_graph.get_vertices, offsets, targets, costs,
+                                           in_offsets, in_sources, in_costs)
+
+    tasks = [range(start, min(start + SOURCES_PER_TASK, number_of_vertices))
+             for start in range(0, number_of_vertices, SOURCES_PER_TASK)]
+    # the workers attach to one shared copy of the reweighted graph instead of each receiving its own
+    with SharedGraph.publish(reweighted_graph) as shared_graph, \
+            ProcessPoolExecutor(max_workers, initializer=init_worker,
+                                initargs=(shared_graph.get_name, potentials)) as executor:
+        for rows in executor.map(worker_rows, tasks):
+            for source, row in rows:
+                matrix.set_row(source, row)
+
+    return matrix
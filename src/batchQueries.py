@@ -0,0 +1,95 @@
+from exceptions import *
+from sharedGraph import SharedGraph
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+# frozen graph of a worker process, set once by the pool initializer
+worker_graph = None
+# SharedGraph the frozen graph of a worker process is a view of
+worker_shared_graph = None
+
+
+def init_worker(shared_graph_name):
+    """
+    Pool initializer: attaches the worker process to the shared graph for all the tasks it runs
+    """
+    global worker_graph, worker_shared_graph
+    worker_shared_graph = SharedGraph.attach(shared_graph_name)
+    worker_graph = worker_shared_graph.get_graph
+
+
+def paths_to_target(graph, end_vertex, start_vertices):
+    """
+    Answers all the queries ending in the same vertex with a single backwards Dijkstra search
+    :param graph: FrozenDirectedGraph or DirectedGraph
+    :param end_vertex: common ending vertex of the walks
+    :param start_vertices: list of starting vertices
+    :return: list with the (path, cost) of every start vertex, None for the ones with no walk to end_vertex
+    """
+    # a single query can stop as soon as its start vertex is settled
+    dist, next = graph.backwards_Dijkstra(start_vertices[0] if len(start_vertices) == 1 else None, end_vertex)
+    results = []
+    for start_vertex in start_vertices:
+        if dist[start_vertex] == 100000000001:
+            results.append(None)
+            continue
+        path = [start_vertex]
+        while path[-1] != end_vertex:
+            path.append(next[path[-1]])
+        results.append((path, dist[start_vertex]))
+
+    return results
+
+
+def worker_paths_to_target(end_vertex, start_vertices):
+    """
+    Task run in a worker process, on the graph received by the pool initializer
+    """
+    return paths_to_target(worker_graph, end_vertex, start_vertices)
+
+
+def lowest_cost_paths(graph, pairs, max_workers=None):
+    """
+    Finds the lowest cost walks of a batch of queries, grouping them by ending vertex so that one backwards Dijkstra
+    search per distinct ending vertex answers the whole group; the groups are spread over a process pool
+    :param graph: DirectedGraph
+    :param pairs: list of (start_vertex, end_vertex) queries
+    :param max_workers: number of worker processes, by default the number of CPUs; 1 runs the batch in this process
+    :return: list with the (path, cost) of every query, in the order of the queries, None for the ones with no walk
+    :raises GraphException if a vertex is invalid
+    """
+    groups = {}
+    for index, (start_vertex, end_vertex) in enumerate(pairs):
+        if not graph.is_vertex(start_vertex) or not graph.is_vertex(end_vertex):
+            raise GraphException("Nonexistent vertex!\n")
+        groups.setdefault(end_vertex, []).append((index, start_vertex))
+
+    frozen_graph = graph.freeze()
+    end_vertices = list(groups)
+    start_vertices = [[start_vertex for index, start_vertex in groups[end_vertex]] for end_vertex in end_vertices]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(end_vertices))
+    if max_workers <= 1:
+        group_results = map(paths_to_target, [frozen_graph] * len(end_vertices), end_vertices, start_vertices)
+        return collect_results(len(pairs), groups, end_vertices, group_results)
+
+    # the workers attach to one shared copy of the graph instead of each receiving its own
+    with SharedGraph.publish(frozen_graph) as shared_graph, \
+            ProcessPoolExecutor(max_workers, initializer=init_worker, initargs=(shared_graph.get_name,)) as executor:
+        chunk_size = max(1, len(end_vertices) // (4 * max_workers))
+        group_results = executor.map(worker_paths_to_target, end_vertices, start_vertices, chunksize=chunk_size)
+        return collect_results(len(pairs), groups, end_vertices, group_results)
+
+
+def collect_results(number_of_pairs, groups, end_vertices, group_results):
+    """
+    Puts the results of every group back in the order of the queries
+    """
+    results = [None] * number_of_pairs
+    for end_vertex, paths in zip(end_vertices, group_results):
+        for (index, start_vertex), path in zip(groups[end_vertex], paths):
+            results[index] = path
+
+    return results
@@ -0,0 +1,348 @@
+from graphIO import load_text_graph, write_text_graph
+from graphGenerators import random_dag
+from undirectedGraph import UndirectedGraph
+from exceptions import *
+from time import perf_counter
+from itertools import chain
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+
+# graph files shipped next to this script
+BUNDLED_GRAPHS = ["example.txt", "graph1k.txt", "graph10k.txt"]
+# numbers of edges of the synthetic graphs, which have 10 edges per vertex
+SYNTHETIC_SIZES = [100000, 1000000, 10000000]
+EDGES_PER_VERTEX = 10
+# number of calls timed together for the operations that take microseconds
+POINT_OPERATIONS = 1000
+# number of (start, end) queries timed together for the path algorithms
+PATH_QUERIES = 5
+# maximum walk length of the Bellman Ford benchmark, which is run on graphs with at most BELLMAN_FORD_MAX_EDGES edges
+BELLMAN_FORD_LENGTH = 10
+BELLMAN_FORD_MAX_EDGES = 1000000
+DEFAULT_REPEAT = 5
+# an operation is a regression if it is slower than the baseline by more than this fraction and by more than
+# DEFAULT_NOISE seconds, as the timings of the fastest operations vary more than that between runs
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_NOISE = 0.001
+
+
+def sample_vertices(graph, count, rng):
+    """
+    :return: list of count random vertices of the graph, with repetitions
+    """
+    vertices = graph.parse_dictionary_keys()
+    return [rng.choice(vertices) for index in range(count)]
+
+
+def sample_edges(graph, count, rng):
+    """
+    :return: list of at most count distinct random edges of the graph
+    """
+    edges = graph.iterable_edges()
+    return rng.sample(edges, min(count, len(edges)))
+
+
+def mutable_copy(graph):
+    """
+    :return: copy of the graph that can be modified without changing the original one
+    """
+    graph = graph.copy_graph()
+    # copy_graph shares the dictionaries of the graph, which are copied by the first mutation; a mutation outside
+    # the timed part makes that copy, so that it isn't counted in the cost of the timed operations
+    sentinel = max(graph.parse_dictionary_keys(), default=-1) + 1
+    graph.add_vertex(sentinel)
+    graph.remove_vertex(sentinel)
+    return graph
+
+
+# every benchmark gets the case and a seeded random.Random, does its own untimed setup and returns the seconds taken
+# by the timed part and the number of calls it made, or None if the operation doesn't apply to the graph
+def bench_is_edge(case, rng):
+    graph = case["graph"]
+    # half existing edges, half random pairs
+    pairs = sample_edges(graph, POINT_OPERATIONS // 2, rng)
+    pairs += list(zip(sample_vertices(graph, POINT_OPERATIONS // 2, rng),
+                      sample_vertices(graph, POINT_OPERATIONS // 2, rng)))
+    start = perf_counter()
+    for start_vertex, end_vertex in pairs:
+        graph.is_edge(start_vertex, end_vertex)
+    return perf_counter() - start, len(pairs)
+
+
+def bench_add_edge(case, rng):
+    graph = mutable_copy(case["graph"])
+    pairs = {}
+    for start_vertex, end_vertex in zip(sample_vertices(graph, POINT_OPERATIONS, rng),
+                                        sample_vertices(graph, POINT_OPERATIONS, rng)):
+        if not graph.is_edge(start_vertex, end_vertex):
+            pairs[(start_vertex, end_vertex)] = None
+    start = perf_counter()
+    for start_vertex, end_vertex in pairs:
+        graph.add_edge(start_vertex, end_vertex, 1)
+    return perf_counter() - start, len(pairs)
+
+
+def bench_remove_edge(case, rng):
+    graph = mutable_copy(case["graph"])
+    edges = sample_edges(graph, POINT_OPERATIONS, rng)
+    start = perf_counter()
+    for start_vertex, end_vertex in edges:
+        graph.remove_edge(start_vertex, end_vertex)
+    return perf_counter() - start, len(edges)
+
+
+def bench_add_vertex(case, rng):
+    graph = mutable_copy(case["graph"])
+    first = max(graph.parse_dictionary_keys(), default=-1) + 1
+    start = perf_counter()
+    for vertex in range(first, first + POINT_OPERATIONS):
+        graph.add_vertex(vertex)
+    return perf_counter() - start, POINT_OPERATIONS
+
+
+def bench_remove_vertex(case, rng):
+    graph = mutable_copy(case["graph"])
+    vertices = rng.sample(graph.parse_dictionary_keys(), min(POINT_OPERATIONS, graph.get_no_of_vertices))
+    start = perf_counter()
+    for vertex in vertices:
+        graph.remove_vertex(vertex)
+    return perf_counter() - start, len(vertices)
+
+
+def bench_copy_graph(case, rng):
+    graph = case["graph"]
+    start = perf_counter()
+    graph.copy_graph()
+    return perf_counter() - start, 1
+
+
+def bench_backwards_Dijkstra(case, rng):
+    graph = case["graph"]
+    pairs = list(zip(sample_vertices(graph, PATH_QUERIES, rng), sample_vertices(graph, PATH_QUERIES, rng)))
+    start = perf_counter()
+    for start_vertex, end_vertex in pairs:
+        graph.backwards_Dijkstra(start_vertex, end_vertex)
+    return perf_counter() - start, len(pairs)
+
+
+def bench_DAG(case, rng):
+    graph = case["graph"]
+    start = perf_counter()
+    graph.DAG()
+    return perf_counter() - start, 1
+
+
+def bench_highest_cost_path(case, rng):
+    graph = case["graph"]
+    sorted = graph.DAG()
+    if not sorted:
+        return None
+    pairs = list(zip(sample_vertices(graph, PATH_QUERIES, rng), sample_vertices(graph, PATH_QUERIES, rng)))
+    # the first query builds the dense index of the vertices, which is kept for the next ones
+    graph.highest_cost_path(sorted, sorted[0], sorted[0])
+    start = perf_counter()
+    for start_vertex, end_vertex in pairs:
+        graph.highest_cost_path(sorted, start_vertex, end_vertex)
+    return perf_counter() - start, len(pairs)
+
+
+def bench_bellman_ford(case, rng):
+    graph = case["graph"]
+    if graph.get_no_of_edges > BELLMAN_FORD_MAX_EDGES:
+        return None
+    start_vertex = sample_vertices(graph, 1, rng)[0]
+    start = perf_counter()
+    graph.bellman_ford(start_vertex, BELLMAN_FORD_LENGTH)
+    return perf_counter() - start, 1
+
+
+def bench_connected_components(case, rng):
+    graph = case.get("undirected")
+    if graph is None:
+        # the undirected version of the graph, built once per case
+        graph = UndirectedGraph(0)
+        for vertex in case["graph"].parse_dictionary_keys():
+            graph.add_vertex(vertex)
+        for start_vertex, end_vertex in case["graph"].iterable_edges():
+            if start_vertex != end_vertex and not graph.is_edge(start_vertex, end_vertex):
+                graph.add_edge(start_vertex, end_vertex, 1)
+        case["undirected"] = graph
+    start = perf_counter()
+    graph.get_all_connected_components()
+    return perf_counter() - start, 1
+
+
+def bench_load(case, rng):
+    start = perf_counter()
+    load_text_graph(case["file_name"])
+    return perf_counter() - start, 1
+
+
+OPERATIONS = {
+    "load": bench_load,
+    "is_edge": bench_is_edge,
+    "add_edge": bench_add_edge,
+    "remove_edge": bench_remove_edge,
+    "add_vertex": bench_add_vertex,
+    "remove_vertex": bench_remove_vertex,
+    "copy_graph": bench_copy_graph,
+    "backwards_Dijkstra": bench_backwards_Dijkstra,
+    "DAG": bench_DAG,
+    "highest_cost_path": bench_highest_cost_path,
+    "bellman_ford": bench_bellman_ford,
+    "connected_components": bench_connected_components,
+}
+
+
+def run_case(case, operations, repeat, seed):
+    """
+    Times the given operations on a graph
+    :param case: dictionary with the name, the graph and the text file of the graph
+    :param operations: names of the operations to time
+    :param repeat: number of runs of every operation; the fastest and the median are reported
+    :param seed: seed of the random vertices and edges the operations are run on, the same in every run
+    :return: dictionary with the size of the graph and the timings of every operation (None for the skipped ones)
+    """
+    graph = case["graph"]
+    results = {"vertices": graph.get_no_of_vertices, "edges": graph.get_no_of_edges, "operations": {}}
+    for name in operations:
+        times = []
+        calls = 0
+        for run in range(repeat):
+            # as in timeit, the garbage collector is off during a run: its full collections traverse every object
+            # of the graph and would be charged to whichever operation triggered them
+            gc.collect()
+            gc.disable()
+            try:
+                measurement = OPERATIONS[name](case, random.Random(seed))
+            finally:
+                gc.enable()
+            if measurement is None:
+                break
+            times.append(measurement[0])
+            calls = measurement[1]
+        if not times:
+            results["operations"][name] = None
+            print("  %-22s skipped" % name)
+            continue
+        results["operations"][name] = {"min": min(times), "median": statistics.median(times), "calls": calls}
+        print("  %-22s %12.6f s  (%d calls, median %.6f s)" % (name, min(times), calls, statistics.median(times)))
+
+    return results
+
+
+def bundled_cases(file_names):
+    """
+    :return: generator of the cases of the given graph files, looked up next to this script if not found as given
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for file_name in file_names:
+        if not os.path.exists(file_name):
+            file_name = os.path.join(directory, file_name)
+        yield {"name": os.path.basename(file_name), "graph": load_text_graph(file_name), "file_name": file_name}
+
+
+def synthetic_cases(sizes, seed, directory):
+    """
+    :return: generator of the cases of random DAGs with the given numbers of edges, written to text files in the
+    given directory so that loading can be timed too
+    """
+    for number_of_edges in sizes:
+        number_of_vertices = max(number_of_edges // EDGES_PER_VERTEX, 2)
+        number_of_edges = min(number_of_edges, number_of_vertices * (number_of_vertices - 1) // 2)
+        file_name = os.path.join(directory, "dag-%d.txt" % number_of_edges)
+        graph = random_dag(number_of_vertices, number_of_edges, seed)
+        write_text_graph(graph, file_name)
+        yield {"name": "dag-%d" % number_of_edges, "graph": graph, "file_name": file_name}
+        os.remove(file_name)
+
+
+def compare(results, baseline, threshold, noise=DEFAULT_NOISE):
+    """
+    :return: list of (case, operation, baseline time, current time) for the operations slower than the baseline
+    by more than the threshold fraction and by more than noise seconds
+    """
+    regressions = []
+    for case, case_results in results["cases"].items():
+        baseline_case = baseline["cases"].get(case)
+        if baseline_case is None:
+            continue
+        for operation, timing in case_results["operations"].items():
+            baseline_timing = baseline_case["operations"].get(operation)
+            if timing is None or baseline_timing is None:
+                continue
+            if timing["min"] > baseline_timing["min"] * (1 + threshold) and \
+                    timing["min"] - baseline_timing["min"] > noise:
+                regressions.append((case, operation, baseline_timing["min"], timing["min"]))
+
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Times the graph operations on the bundled and on synthetic graphs")
+    parser.add_argument("--graphs", nargs="*", default=BUNDLED_GRAPHS, help="graph files in the text format")
+    parser.add_argument("--sizes", nargs="*", type=int, default=SYNTHETIC_SIZES,
+                        help="numbers of edges of the synthetic graphs")
+    parser.add_argument("--operations", nargs="*", default=list(OPERATIONS), choices=list(OPERATIONS))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file the results are written to")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fraction by which an operation may be slower than the baseline")
+    parser.add_argument("--noise", type=float, default=DEFAULT_NOISE,
+                        help="seconds by which an operation may be slower than the baseline")
+    arguments = parser.parse_args(arguments)
+
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy_version,
+        "seed": arguments.seed,
+        "repeat": arguments.repeat,
+        "cases": {}
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        # the cases are made one at a time, so only one graph is kept in memory
+        for case in chain(bundled_cases(arguments.graphs),
+                          synthetic_cases(arguments.sizes, arguments.seed, directory)):
+            print("%s: %d vertices, %d edges" % (case["name"], case["graph"].get_no_of_vertices,
+                                                 case["graph"].get_no_of_edges))
+            results["cases"][case["name"]] = run_case(case, arguments.operations, arguments.repeat, arguments.seed)
+
+    with open(arguments.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print("Results written to", arguments.output)
+
+    if arguments.baseline is None:
+        return 0
+    try:
+        with open(arguments.baseline) as f:
+            baseline = json.load(f)
+    except (IOError, ValueError):
+        raise GraphException("Error reading baseline file!\n")
+    regressions = compare(results, baseline, arguments.threshold, arguments.noise)
+    for case, operation, baseline_time, time in regressions:
+        print("REGRESSION %s %s: %.6f s -> %.6f s (%+.0f%%)" % (case, operation, baseline_time, time,
+                                                               100 * (time / baseline_time - 1)))
+    if regressions:
+        return 1
+    print("No regressions over the %.0f%% threshold" % (100 * arguments.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
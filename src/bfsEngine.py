@@ -0,0 +1,203 @@
+from exceptions import *
+from collections import deque
+from itertools import chain
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# graphs with at least this many vertices are traversed with NumPy frontier arrays, when NumPy is installed
+NUMPY_THRESHOLD = 100000
+
+
+def choose_numpy(neighbors, use_numpy):
+    """
+    :param use_numpy: True, False, or None to decide by the size of the graph
+    :return: true if the NumPy engine should be used, false otherwise
+    :raises GraphException if the NumPy engine is requested but NumPy is not installed
+    """
+    if use_numpy is None:
+        return numpy is not None and len(neighbors) >= NUMPY_THRESHOLD
+    if use_numpy and numpy is None:
+        raise GraphException("NumPy is not installed!\n")
+    return use_numpy
+
+
+def breadth_first_tree(neighbors, source_vertex, is_visited=None, use_numpy=None, stats=None):
+    """
+    Breadth-first traversal from a vertex
+    :param neighbors: dictionary with the neighbors of every vertex
+    :param source_vertex: start vertex of the traversal
+    :param is_visited: set of already visited vertices, updated with the reached ones; the reached vertices are
+    only those not in it (only supported by the deque engine)
+    :param use_numpy: True, False, or None to decide by the size of the graph
+    :param stats: AlgorithmStats updated by the traversal, if any
+    :return: list of the reached vertices in BFS order, dictionary with the level (distance in edges from the source)
+    of every reached vertex and dictionary with the parent of every reached vertex (None for the source)
+    :raises GraphException if the source vertex is invalid
+    """
+    if source_vertex not in neighbors:
+        raise GraphException("Nonexistent vertex!\n")
+
+    if is_visited is None and choose_numpy(neighbors, use_numpy):
+        vertices, offsets, targets = build_csr(neighbors)
+        source_slot = int(numpy.flatnonzero(vertices == source_vertex)[0])
+        order, levels, parents = frontier_tree(offsets, targets, source_slot, stats)
+        parent_vertices = vertices[parents[order]].tolist()
+        parent_vertices[0] = None
+        order_vertices = vertices[order].tolist()
+        return order_vertices, dict(zip(order_vertices, levels[order].tolist())), \
+            dict(zip(order_vertices, parent_vertices))
+
+    if is_visited is None:
+        is_visited = set()
+    is_visited.add(source_vertex)
+    order = [source_vertex]
+    levels = {source_vertex: 0}
+    parents = {source_vertex: None}
+    queue = deque(order)
+    while queue:
+        if stats is not None:
+            stats.frontier(len(queue))
+            stats.vertices_settled += 1
+            stats.edges_scanned += len(neighbors[queue[0]])
+        vertex = queue.popleft()
+        level = levels[vertex] + 1
+        for neighbor in neighbors[vertex]:
+            if neighbor not in is_visited:
+                is_visited.add(neighbor)
+                order.append(neighbor)
+                levels[neighbor] = level
+                parents[neighbor] = vertex
+                queue.append(neighbor)
+
+    return order, levels, parents
+
+
+def connected_components(neighbors, use_numpy=None, stats=None):
+    """
+    Finds the connected components of an undirected graph
+    :param neighbors: dictionary with the neighbors of every vertex, with every edge stored in both directions
+    :param use_numpy: True, False, or None to decide by the size of the graph
+    :param stats: AlgorithmStats updated by the traversals, if any
+    :return: list of the connected components, in the order of their first vertex; the deque engine lists the
+    vertices of a component in BFS order, the NumPy engine in the order of the neighbors dictionary
+    """
+    if choose_numpy(neighbors, use_numpy):
+        return frontier_components(neighbors, stats)
+
+    is_visited = set()
+    components = []
+    for vertex in neighbors:
+        if vertex not in is_visited:
+            components.append(breadth_first_tree(neighbors, vertex, is_visited, stats=stats)[0])
+
+    return components
+
+
+def build_csr(neighbors):
+    """
+    Converts a neighbors dictionary to NumPy arrays; the slot of a vertex is its position in the dictionary
+    :return: array of the vertices, array with the offset of the neighbors of every slot, array of the neighbor slots
+    """
+    number_of_vertices = len(neighbors)
+    vertices = numpy.fromiter(neighbors, dtype=numpy.int64, count=number_of_vertices)
+    degrees = numpy.fromiter(map(len, neighbors.values()), dtype=numpy.int64, count=number_of_vertices)
+    offsets = numpy.zeros(number_of_vertices + 1, dtype=numpy.int64)
+    numpy.cumsum(degrees, out=offsets[1:])
+    targets = numpy.fromiter(chain.from_iterable(neighbors.values()), dtype=numpy.int64, count=int(offsets[-1]))
+    if number_of_vertices == 0:
+        return vertices, offsets, targets
+
+    # vertex ids -> slots: a lookup table when the ids are dense enough, a binary search over the sorted ids otherwise
+    lowest = int(vertices.min())
+    span = int(vertices.max()) - lowest + 1
+    if span <= 4 * number_of_vertices:
+        slots = numpy.empty(span, dtype=numpy.int64)
+        slots[vertices - lowest] = numpy.arange(number_of_vertices, dtype=numpy.int64)
+        targets = slots[targets - lowest]
+    else:
+        by_vertex = numpy.argsort(vertices, kind="stable")
+        targets = by_vertex[numpy.searchsorted(vertices[by_vertex], targets)]
+
+    return vertices, offsets, targets
+
+
+def frontier_tree(offsets, targets, source_slot, stats=None):
+    """
+    Level-synchronous BFS: every level is expanded at once with array operations
+    :return: array of the reached slots in BFS order, array with the level of every slot (-1 for the unreached ones)
+    and array with the parent of every slot (-1 for the source and the unreached ones)
+    """
+    number_of_vertices = len(offsets) - 1
+    levels = numpy.full(number_of_vertices, -1, dtype=numpy.int64)
+    parents = numpy.full(number_of_vertices, -1, dtype=numpy.int64)
+    levels[source_slot] = 0
+    frontier = numpy.array([source_slot], dtype=numpy.int64)
+    order = [frontier]
+    level = 0
+    while frontier.size:
+        starts = offsets[frontier]
+        counts = offsets[frontier + 1] - starts
+        total = int(counts.sum())
+        if stats is not None:
+            stats.frontier(len(frontier))
+            stats.vertices_settled += len(frontier)
+            stats.edges_scanned += total
+        if total == 0:
+            break
+        # positions in targets of all the edges leaving the frontier
+        first_positions = numpy.cumsum(counts) - counts
+        positions = numpy.arange(total) + numpy.repeat(starts - first_positions, counts)
+        found = targets[positions]
+        sources = numpy.repeat(frontier, counts)
+        unvisited = levels[found] == -1
+        # a slot reached from several frontier slots takes the first one as parent
+        found, first = numpy.unique(found[unvisited], return_index=True)
+        level += 1
+        levels[found] = level
+        parents[found] = sources[unvisited][first]
+        order.append(found)
+        frontier = found
+
+    return numpy.concatenate(order), levels, parents
+
+
+def frontier_components(neighbors, stats=None):
+    """
+    Connected components by label propagation: every root label is hooked to the smallest label across its edges,
+    then labels are shortcut to their roots by pointer jumping, until the labels of the endpoints of every edge agree
+    :return: list of the connected components, in the order of their first vertex in the neighbors dictionary
+    """
+    if not neighbors:
+        return []
+
+    vertices, offsets, targets = build_csr(neighbors)
+    number_of_vertices = len(vertices)
+    labels = numpy.arange(number_of_vertices, dtype=numpy.int64)
+    sources = numpy.repeat(labels, numpy.diff(offsets))
+    if stats is not None:
+        stats.vertices_settled = number_of_vertices
+    while True:
+        if stats is not None:
+            stats.edges_scanned += len(targets)
+        source_labels = labels[sources]
+        target_labels = labels[targets]
+        different = source_labels != target_labels
+        if not different.any():
+            break
+        source_labels = source_labels[different]
+        target_labels = target_labels[different]
+        numpy.minimum.at(labels, numpy.maximum(source_labels, target_labels),
+                         numpy.minimum(source_labels, target_labels))
+        while True:
+            jumped = labels[labels]
+            if numpy.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+    # the slots of every component, each component starting at its smallest slot
+    by_label = numpy.argsort(labels, kind="stable")
+    boundaries = numpy.flatnonzero(numpy.diff(labels[by_label])) + 1
+    return [component.tolist() for component in numpy.split(vertices[by_label], boundaries)]
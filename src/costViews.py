@@ -0,0 +1,54 @@
+from collections.abc import Mapping
+
+
+class DirectedCostView(Mapping):
+    """
+    Read-only mapping (start_vertex, end_vertex) -> cost over the edges of a DirectedGraph, which keeps the cost of
+    every edge as the value of the end vertex in the outbound neighbors of the start vertex (and of the start vertex
+    in the inbound neighbors of the end vertex). The view always reflects the current edges of the graph.
+    """
+    def __init__(self, graph):
+        self.__graph = graph
+
+    def __getitem__(self, edge):
+        try:
+            start_vertex, end_vertex = edge
+            return self.__graph.get_out_neighbors[start_vertex][end_vertex]
+        except (KeyError, TypeError, ValueError):
+            raise KeyError(edge)
+
+    def __iter__(self):
+        for start_vertex, neighbors in self.__graph.get_out_neighbors.items():
+            for end_vertex in neighbors:
+                yield start_vertex, end_vertex
+
+    def __len__(self):
+        return self.__graph.get_no_of_edges
+
+
+class UndirectedCostView(Mapping):
+    """
+    Read-only mapping (start_vertex, end_vertex) -> cost over the edges of an UndirectedGraph, which keeps the cost of
+    every edge as the value of each endpoint in the neighbors of the other one. Every edge is listed once, from the
+    endpoint that comes first in the vertices of the graph, and can be looked up in both directions.
+    """
+    def __init__(self, graph):
+        self.__graph = graph
+
+    def __getitem__(self, edge):
+        try:
+            start_vertex, end_vertex = edge
+            return self.__graph.get_neighbors[start_vertex][end_vertex]
+        except (KeyError, TypeError, ValueError):
+            raise KeyError(edge)
+
+    def __iter__(self):
+        listed = set()
+        for start_vertex, neighbors in self.__graph.get_neighbors.items():
+            listed.add(start_vertex)
+            for end_vertex in neighbors:
+                if end_vertex not in listed:
+                    yield start_vertex, end_vertex
+
+    def __len__(self):
+        return self.__graph.get_no_of_edges
@@ -0,0 +1,132 @@
+from exceptions import *
+from collections.abc import Mapping
+
+
+class DenseIndex:
+    """
+    Maps the vertices of a graph, whose ids can be any hashable values, to dense slots 0..size-1, so that algorithms
+    can keep their per-vertex state in flat lists indexed by slot. A removed vertex leaves a free slot behind, and the
+    slots are renumbered (compacted) once more than half of them are free; the ids never change.
+    """
+    def __init__(self, vertices=()):
+        self.__vertices = list(vertices)
+        self.__slots = {vertex: slot for slot, vertex in enumerate(self.__vertices)}
+        self.__free = 0
+        # true while every vertex is its own slot, so that slot lists can be handed out as vertex-indexed lists
+        self.__identity = all(vertex == slot for slot, vertex in enumerate(self.__vertices))
+
+    @property
+    def get_size(self):
+        """
+        :return: number of slots, free ones included; lists indexed by slot must have this length
+        """
+        return len(self.__vertices)
+
+    @property
+    def get_count(self):
+        """
+        :return: number of vertices in the index
+        """
+        return len(self.__slots)
+
+    @property
+    def get_identity(self):
+        """
+        :return: true if the vertices are exactly 0..size-1 and every vertex is its own slot, false otherwise
+        """
+        return self.__identity
+
+    @property
+    def get_slots(self):
+        """
+        :return: dictionary with the slot of every vertex; it must not be modified
+        """
+        return self.__slots
+
+    @property
+    def get_vertices(self):
+        """
+        :return: list with the vertex of every slot, None for the free ones; it must not be modified
+        """
+        return self.__vertices
+
+    def __contains__(self, vertex):
+        return vertex in self.__slots
+
+    def slot_of(self, vertex):
+        """
+        :return: the slot of the given vertex
+        :raises GraphException if vertex is not in the index
+        """
+        try:
+            return self.__slots[vertex]
+        except KeyError:
+            raise GraphException("Nonexistent vertex!\n")
+
+    def add(self, vertex):
+        """
+        Gives a new vertex the slot after the last one
+        :return: the slot of the vertex
+        """
+        if vertex in self.__slots:
+            return self.__slots[vertex]
+        slot = len(self.__vertices)
+        self.__identity = self.__identity and vertex == slot
+        self.__vertices.append(vertex)
+        self.__slots[vertex] = slot
+        return slot
+
+    def remove(self, vertex):
+        """
+        Frees the slot of a vertex, compacting the slots if most of them are free
+        """
+        slot = self.__slots.pop(vertex)
+        if slot == len(self.__vertices) - 1:
+            self.__vertices.pop()
+        else:
+            self.__vertices[slot] = None
+            self.__free += 1
+            self.__identity = False
+        if 2 * self.__free > len(self.__vertices):
+            self.compact()
+
+    def compact(self):
+        """
+        Renumbers the vertices to slots 0..count-1, keeping their order
+        """
+        self.__vertices = list(self.__slots)
+        self.__slots = {vertex: slot for slot, vertex in enumerate(self.__vertices)}
+        self.__free = 0
+        self.__identity = all(vertex == slot for slot, vertex in enumerate(self.__vertices))
+
+
+class DenseValues(Mapping):
+    """
+    Read-only mapping vertex -> value over a list indexed by dense slots, through which an algorithm hands out its
+    per-slot results keyed by vertex without converting the list to a dictionary
+    """
+    def __init__(self, slots, values):
+        """
+        :param slots: dictionary with the slot of every vertex, None if the vertices are 0..len(values)-1 and every
+        vertex is its own slot; it must not be modified afterwards
+        :param values: list indexed by slot
+        """
+        self.__slots = slots
+        self.__values = values
+
+    def __getitem__(self, vertex):
+        if self.__slots is None:
+            if isinstance(vertex, int) and 0 <= vertex < len(self.__values):
+                return self.__values[vertex]
+            raise KeyError(vertex)
+        return self.__values[self.__slots[vertex]]
+
+    def __iter__(self):
+        if self.__slots is None:
+            return iter(range(len(self.__values)))
+        return iter(self.__slots)
+
+    def __len__(self):
+        if self.__slots is None:
+            return len(self.__values)
+        return len(self.__slots)
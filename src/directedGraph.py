@@ -1,7 +1,17 @@
-from queue import PriorityQueue
 from exceptions import *
+from frozenGraph import FrozenDirectedGraph
+from pathCache import ShortestPathCache, DEFAULT_MAX_BYTES
+from batchQueries import lowest_cost_paths
+from allPairs import johnson_all_pairs
+from landmarks import LandmarkIndex, graph_fingerprint
+from instrumentation import Instrumentation
+from bfsEngine import connected_components
+from costViews import DirectedCostView
+from denseIndex import DenseIndex, DenseValues
+from array import array
+from collections import deque
+from heapq import heappush, heappop
 from math import inf
-import copy
 
 
 class DirectedGraph:
@@ -9,11 +19,36 @@ class DirectedGraph:
         self.__no_of_vertices = number_of_vertices
         self.__outbound_neighbors = {}
         self.__inbound_neighbors = {}
-        self.__costs = {}
+        self.__no_of_edges = 0
+        # bumped by every mutation, so that results computed on an older state of the graph can be recognised
+        self.__version = 0
+        self.__path_cache = None
+        # landmark index settings (number of landmarks, file name), the index and the snapshot it was built on
+        self.__landmark_settings = None
+        self.__landmark_index = None
+        self.__landmark_graph = None
+        # online topological order: vertices by position (None for removed ones) and the position of every vertex;
+        # both are None while the mode is disabled
+        self.__topological_order = None
+        self.__topological_position = None
+        # dense slots of the vertices for the algorithms that keep their state in lists; built on first use and
+        # then kept up to date by add_vertex and remove_vertex, since the vertex ids have gaps after removals
+        self.__dense_index = None
+        # copy-on-write state: copy_graph shares all the dictionaries with the copy; the outer dictionaries are
+        # copied on the first mutation and the neighbors of a vertex only when they are modified
+        self.__shared = False
+        self.__copy_on_write = False
+        self.__owned_outbound = set()
+        self.__owned_inbound = set()
+        # opt-in counters of the algorithm runs
+        self.__instrumentation = Instrumentation()
 
+        # the neighbors of every vertex are kept as insertion-ordered dictionaries mapping every neighbor to the cost
+        # of the edge between them, so membership, cost lookup, insertion and removal are O(1) and iteration order
+        # stays deterministic; the cost of an edge is stored in the dictionaries of both its endpoints
         for vertex in range(self.__no_of_vertices):
-            self.__outbound_neighbors[vertex] = []
-            self.__inbound_neighbors[vertex] = []
+            self.__outbound_neighbors[vertex] = {}
+            self.__inbound_neighbors[vertex] = {}
 
     @property
     def get_no_of_vertices(self):
@@ -27,7 +62,37 @@ class DirectedGraph:
         """
         :return: number of edges of the graph
         """
-        return len(self.__costs.keys())
+        return self.__no_of_edges
+
+    @property
+    def get_version(self):
+        """
+        :return: mutation counter of the graph, changed by every operation that modifies the graph
+        """
+        return self.__version
+
+    @property
+    def get_path_cache_statistics(self):
+        """
+        :return: hit/miss statistics of the shortest path cache, None if the cache isn't enabled
+        """
+        if self.__path_cache is None:
+            return None
+        return self.__path_cache.get_statistics
+
+    @property
+    def get_instrumentation(self):
+        """
+        :return: the Instrumentation recording the algorithm runs of the graph
+        """
+        return self.__instrumentation
+
+    @property
+    def get_last_stats(self):
+        """
+        :return: the AlgorithmStats of the last instrumented algorithm run, None if there is none
+        """
+        return self.__instrumentation.get_last
 
     @property
     def get_out_neighbors(self):
@@ -46,16 +111,19 @@ class DirectedGraph:
     @property
     def get_costs(self):
         """
-        :return: costs of the graph
+        :return: costs of the graph, as a read-only mapping (start_vertex, end_vertex) -> cost
         """
-        return self.__costs
+        return DirectedCostView(self)
 
     def get_cost_of_edge(self, start_vertex, end_vertex):
         """
         :return: cost of given edge if it exists
+        :raises GraphException if start_vertex is invalid
         """
-        if self.is_edge(start_vertex, end_vertex):
-            return self.__costs[(start_vertex, end_vertex)]
+        try:
+            return self.__outbound_neighbors[start_vertex].get(end_vertex)
+        except KeyError:
+            raise GraphException("There isn't an edge between these 2 vertices in the graph!\n")
 
     def get_isolated_vertices(self):
         """
@@ -118,6 +186,47 @@ class DirectedGraph:
         except KeyError:
             raise GraphException("Nonexistent vertex!\n")
 
+    def iterate_outbound_edges(self, vertex):
+        """
+        :param vertex: vertex whose outbound edges are searched
+        :return: a list of (end_vertex, cost) tuples for all outbound edges of given vertex
+        :raises GraphException if vertex is invalid
+        """
+        try:
+            return list(self.__outbound_neighbors[vertex].items())
+        except KeyError:
+            raise GraphException("Nonexistent vertex!\n")
+
+    def parse_outbound_edges(self, vertex):
+        """
+        :param vertex: vertex whose outbound edges are searched
+        :return: live read-only view of the (end_vertex, cost) pairs of the outbound edges of given vertex, which must
+        not be iterated while the graph is modified
+        :raises GraphException if vertex is invalid
+        """
+        try:
+            return self.__outbound_neighbors[vertex].items()
+        except KeyError:
+            raise GraphException("Nonexistent vertex!\n")
+
+    def parse_inbound_edges(self, vertex):
+        """
+        :param vertex: vertex whose inbound edges are searched
+        :return: live read-only view of the (start_vertex, cost) pairs of the inbound edges of given vertex, which must
+        not be iterated while the graph is modified
+        :raises GraphException if vertex is invalid
+        """
+        try:
+            return self.__inbound_neighbors[vertex].items()
+        except KeyError:
+            raise GraphException("Nonexistent vertex!\n")
+
+    def is_vertex(self, vertex):
+        """
+        :return: true if given vertex belongs to the graph, false otherwise
+        """
+        return vertex in self.__outbound_neighbors
+
     def is_edge(self, start_vertex, end_vertex):
         """
         Checks if there is an edge between the 2 given vertices
@@ -143,10 +252,59 @@ class DirectedGraph:
 
         if len(err) > 0:
             raise GraphException(err)
+        if end_vertex not in self.__inbound_neighbors:
+            raise GraphException("Nonexistent vertex!\n")
+        if self.__topological_position is not None:
+            self.__reorder_for_edge(start_vertex, end_vertex)
 
-        self.__outbound_neighbors[start_vertex].append(end_vertex)
-        self.__inbound_neighbors[end_vertex].append(start_vertex)
-        self.__costs[(start_vertex, end_vertex)] = cost
+        self.__unshare()
+        self.__writable_outbound(start_vertex)[end_vertex] = cost
+        self.__writable_inbound(end_vertex)[start_vertex] = cost
+        self.__no_of_edges += 1
+        self.__version += 1
+
+    def add_edges_from(self, edges):
+        """
+        Adds a batch of new edges to the graph; the whole batch is validated before any edge is added
+        :param edges: iterable of (start_vertex, end_vertex, cost) tuples
+        :raises GraphException if an edge already exists in the graph, appears twice in the batch or has invalid vertices
+        """
+        edges = edges if isinstance(edges, list) else list(edges)
+        outbound_neighbors = self.__outbound_neighbors
+
+        # validate the whole batch before touching the graph
+        new_costs = {(start_vertex, end_vertex): cost for start_vertex, end_vertex, cost in edges}
+        endpoints = {start_vertex for start_vertex, end_vertex in new_costs}
+        endpoints.update(end_vertex for start_vertex, end_vertex in new_costs)
+        if len(new_costs) != len(edges) or any(end_vertex in outbound_neighbors.get(start_vertex, ())
+                                               for start_vertex, end_vertex in new_costs):
+            raise GraphException("Edge already exists in the graph!\n")
+        if not endpoints <= outbound_neighbors.keys():
+            raise GraphException("Nonexistent vertex!\n")
+
+        self.__unshare()
+        outbound_neighbors = self.__outbound_neighbors
+        inbound_neighbors = self.__inbound_neighbors
+        if self.__copy_on_write:
+            for vertex in endpoints:
+                self.__writable_outbound(vertex)
+                self.__writable_inbound(vertex)
+        for (start_vertex, end_vertex), cost in new_costs.items():
+            outbound_neighbors[start_vertex][end_vertex] = cost
+            inbound_neighbors[end_vertex][start_vertex] = cost
+        self.__no_of_edges += len(new_costs)
+
+        if self.__topological_position is not None:
+            # a big batch is cheaper to check with one sort than edge by edge
+            is_dag, order = self.topological_sort("kahn")
+            if not is_dag:
+                for start_vertex, end_vertex in new_costs:
+                    del outbound_neighbors[start_vertex][end_vertex]
+                    del inbound_neighbors[end_vertex][start_vertex]
+                self.__no_of_edges -= len(new_costs)
+                raise GraphException("Edges would close a cycle!\n")
+            self.__set_topological_order(order)
+        self.__version += 1
 
     def remove_edge(self, start_vertex, end_vertex):
         """
@@ -158,9 +316,11 @@ class DirectedGraph:
         if not self.is_edge(start_vertex, end_vertex):
             raise GraphException("Edge doesn't exist!\n")
 
-        self.__outbound_neighbors[start_vertex].remove(end_vertex)
-        self.__inbound_neighbors[end_vertex].remove(start_vertex)
-        del self.__costs[(start_vertex, end_vertex)]
+        self.__unshare()
+        del self.__writable_outbound(start_vertex)[end_vertex]
+        del self.__writable_inbound(end_vertex)[start_vertex]
+        self.__no_of_edges -= 1
+        self.__version += 1
 
     def add_vertex(self, new_vertex):
         """
@@ -169,15 +329,25 @@ class DirectedGraph:
         :raises GraphException if vertex already exists in the graph
         """
         err = ""
-        if new_vertex in self.parse_dictionary_keys():
+        if new_vertex in self.__outbound_neighbors:
             err += "Vertex already exists in the graph!\n"
 
         if len(err) > 0:
             raise GraphException(err)
 
-        self.__outbound_neighbors[new_vertex] = []
-        self.__inbound_neighbors[new_vertex] = []
+        self.__unshare()
+        self.__outbound_neighbors[new_vertex] = {}
+        self.__inbound_neighbors[new_vertex] = {}
+        if self.__copy_on_write:
+            self.__owned_outbound.add(new_vertex)
+            self.__owned_inbound.add(new_vertex)
         self.__no_of_vertices += 1
+        if self.__topological_position is not None:
+            self.__topological_position[new_vertex] = len(self.__topological_order)
+            self.__topological_order.append(new_vertex)
+        if self.__dense_index is not None:
+            self.__dense_index.add(new_vertex)
+        self.__version += 1
 
     def remove_vertex(self, vertex):
         """
@@ -185,43 +355,164 @@ class DirectedGraph:
         :param vertex: vertex to be removed
         :raises GraphException if vertex doesn't exist in the graph
         """
-        if vertex not in self.parse_dictionary_keys():
+        if vertex not in self.__outbound_neighbors:
             raise GraphException("Nonexistent vertex!\n")
 
+        self.__unshare()
         # remove all edges that start from given vertex -> outbound neighbors
         for end_vertex in self.__outbound_neighbors[vertex]:
-            self.__inbound_neighbors[end_vertex].remove(vertex)
-            del self.__costs[(vertex, end_vertex)]
+            if end_vertex != vertex:
+                del self.__writable_inbound(end_vertex)[vertex]
+        self.__no_of_edges -= len(self.__outbound_neighbors[vertex])
 
         # remove all edges that end in given vertex -> inbound neighbors
         for start_vertex in self.__inbound_neighbors[vertex]:
-            self.__outbound_neighbors[start_vertex].remove(vertex)
-            del self.__costs[(start_vertex, vertex)]
+            if start_vertex != vertex:
+                del self.__writable_outbound(start_vertex)[vertex]
+                self.__no_of_edges -= 1
 
         # remove vertex
         del self.__outbound_neighbors[vertex]
         del self.__inbound_neighbors[vertex]
+        self.__owned_outbound.discard(vertex)
+        self.__owned_inbound.discard(vertex)
         self.__no_of_vertices -= 1
+        if self.__topological_position is not None:
+            self.__topological_order[self.__topological_position.pop(vertex)] = None
+            # compact the order once most of its positions are free
+            if 2 * len(self.__topological_position) < len(self.__topological_order):
+                self.__set_topological_order(self.get_topological_order())
+        if self.__dense_index is not None:
+            self.__dense_index.remove(vertex)
+        self.__version += 1
 
     def copy_graph(self):
         """
-        :return: deepcopy copy of current graph
+        Makes an O(1) copy-on-write snapshot of the graph: the copy shares all its dictionaries with the original,
+        and each of the 2 graphs copies a dictionary only before modifying it, so they stay independent
+        :return: copy of current graph
         """
-        graph_copy = DirectedGraph(self.__no_of_vertices)
+        graph_copy = DirectedGraph(0)
         graph_copy.__no_of_vertices = self.__no_of_vertices
-        graph_copy.__outbound_neighbors = copy.deepcopy(self.__outbound_neighbors)
-        graph_copy.__inbound_neighbors = copy.deepcopy(self.__inbound_neighbors)
-        graph_copy.__costs = copy.deepcopy(self.__costs)
+        graph_copy.__outbound_neighbors = self.__outbound_neighbors
+        graph_copy.__inbound_neighbors = self.__inbound_neighbors
+        graph_copy.__no_of_edges = self.__no_of_edges
+        graph_copy.__version = self.__version
+
+        # from now on, neither graph owns any of the dictionaries
+        for graph in (self, graph_copy):
+            graph.__shared = True
+            graph.__copy_on_write = True
+            graph.__owned_outbound = set()
+            graph.__owned_inbound = set()
 
         return graph_copy
 
+    def __get_dense_index(self):
+        """
+        :return: the DenseIndex of the vertices, built on the first call
+        """
+        if self.__dense_index is None:
+            self.__dense_index = DenseIndex(self.__outbound_neighbors)
+        return self.__dense_index
+
+    def __unshare(self):
+        """
+        Makes private shallow copies of the outer dictionaries if they are shared with another graph
+        """
+        if self.__shared:
+            self.__outbound_neighbors = dict(self.__outbound_neighbors)
+            self.__inbound_neighbors = dict(self.__inbound_neighbors)
+            self.__shared = False
+
+    def __writable_outbound(self, vertex):
+        """
+        :return: the outbound neighbors of the vertex, copied first if they may be shared with another graph
+        """
+        neighbors = self.__outbound_neighbors[vertex]
+        if self.__copy_on_write and vertex not in self.__owned_outbound:
+            neighbors = dict(neighbors)
+            self.__outbound_neighbors[vertex] = neighbors
+            self.__owned_outbound.add(vertex)
+        return neighbors
+
+    def __writable_inbound(self, vertex):
+        """
+        :return: the inbound neighbors of the vertex, copied first if they may be shared with another graph
+        """
+        neighbors = self.__inbound_neighbors[vertex]
+        if self.__copy_on_write and vertex not in self.__owned_inbound:
+            neighbors = dict(neighbors)
+            self.__inbound_neighbors[vertex] = neighbors
+            self.__owned_inbound.add(vertex)
+        return neighbors
+
+    def to_csr(self):
+        """
+        Builds the compressed sparse row representation of the graph
+        :return: tuple (vertices, out_offsets, out_targets, out_costs, in_offsets, in_sources, in_costs) of arrays,
+        where the targets and sources are slots of the sorted vertices array
+        """
+        vertices = array("q", sorted(self.__outbound_neighbors.keys()))
+        slot_of = {vertex: slot for slot, vertex in enumerate(vertices)}
+        cost_type = "q" if all(type(cost) is int for neighbors in self.__outbound_neighbors.values()
+                               for cost in neighbors.values()) else "d"
+
+        out_offsets = array("q", [0])
+        out_targets = array("q")
+        out_costs = array(cost_type)
+        in_offsets = array("q", [0])
+        in_sources = array("q")
+        in_costs = array(cost_type)
+        for vertex in vertices:
+            for end_vertex, cost in self.__outbound_neighbors[vertex].items():
+                out_targets.append(slot_of[end_vertex])
+                out_costs.append(cost)
+            out_offsets.append(len(out_targets))
+            for start_vertex, cost in self.__inbound_neighbors[vertex].items():
+                in_sources.append(slot_of[start_vertex])
+                in_costs.append(cost)
+            in_offsets.append(len(in_sources))
+
+        return vertices, out_offsets, out_targets, out_costs, in_offsets, in_sources, in_costs
+
+    def freeze(self):
+        """
+        :return: an immutable, array-backed snapshot of the current graph, on which the read-only operations
+        and the path algorithms can be run
+        """
+        return FrozenDirectedGraph(*self.to_csr())
+
+    @staticmethod
+    def from_frozen(frozen_graph):
+        """
+        Builds a mutable graph from a frozen snapshot
+        :param frozen_graph: FrozenDirectedGraph instance
+        :return: DirectedGraph with the same vertices, edges and costs
+        """
+        graph = DirectedGraph(0)
+        vertices = frozen_graph.get_vertices
+        offsets = frozen_graph.get_out_offsets
+        targets = frozen_graph.get_out_targets
+        costs = frozen_graph.get_out_costs
+        for vertex in vertices:
+            graph.add_vertex(vertex)
+        graph.add_edges_from([(vertex, vertices[targets[position]], costs[position])
+                              for slot, vertex in enumerate(vertices)
+                              for position in range(offsets[slot], offsets[slot + 1])])
+
+        return graph
+
     def update_cost(self, start_vertex, end_vertex, new_cost):
         """
         Changes the cost of an edge (start_vertex, end_vertex) with given value
         :raises GraphException if edge doesn't exit in the graph
         """
-        if (start_vertex, end_vertex) in self.__costs:
-            self.__costs[(start_vertex, end_vertex)] = new_cost
+        if start_vertex in self.__outbound_neighbors and end_vertex in self.__outbound_neighbors[start_vertex]:
+            self.__unshare()
+            self.__writable_outbound(start_vertex)[end_vertex] = new_cost
+            self.__writable_inbound(end_vertex)[start_vertex] = new_cost
+            self.__version += 1
         else:
             raise GraphException("Nonexistent edge!")
 
@@ -229,30 +520,129 @@ class DirectedGraph:
         """
         :return: returns the edges of a graph in iterable form
         """
-        edges = []
-        for edge in self.__costs:
-            edges.append(edge)
-
-        return edges[:]
+        return [(start_vertex, end_vertex) for start_vertex, neighbors in self.__outbound_neighbors.items()
+                for end_vertex in neighbors]
 
     def iterable_costs(self):
         """
-        :return: returns the costs of a graph in iterable form
+        :return: returns the costs of a graph in iterable form, in the same order as iterable_edges
+        """
+        return [cost for neighbors in self.__outbound_neighbors.values() for cost in neighbors.values()]
+
+    def enable_path_cache(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Enables caching of the backwards shortest path trees used by get_lowest_cost_path
+        :param max_bytes: memory cap of the cache, the least recently used trees are evicted above it
+        """
+        self.__path_cache = ShortestPathCache(max_bytes)
+
+    def disable_path_cache(self):
+        """
+        Disables and drops the shortest path cache
+        """
+        self.__path_cache = None
+
+    def enable_instrumentation(self):
+        """
+        Starts recording the counters and timings of every algorithm run
+        """
+        self.__instrumentation.enable()
+
+    def disable_instrumentation(self):
+        """
+        Stops recording algorithm runs; the recorded ones are kept
         """
-        costs = []
-        for cost in self.__costs:
-            costs.append(self.__costs[cost])
+        self.__instrumentation.disable()
 
-        return costs[:]
+    def instrumented(self):
+        """
+        Context manager recording the algorithm runs of its block:
+            with graph.instrumented() as instrumentation:
+                graph.backwards_Dijkstra(start_vertex, end_vertex)
+            print(instrumentation.get_last)
+        :return: context manager giving the Instrumentation of the graph
+        """
+        return self.__instrumentation.session()
+
+    def enable_landmarks(self, number_of_landmarks=8, file_name=None):
+        """
+        Enables the ALT landmark index used by get_lowest_cost_path with method "alt"; the index is built on the first
+        query and rebuilt lazily on the first query after the graph is modified
+        :param number_of_landmarks: number of landmarks of the index
+        :param file_name: file where the index is persisted; an index found there is reused if it matches the graph
+        """
+        self.__landmark_settings = (number_of_landmarks, file_name)
+        self.__landmark_index = None
+        self.__landmark_graph = None
+
+    def disable_landmarks(self):
+        """
+        Disables and drops the landmark index
+        """
+        self.__landmark_settings = None
+        self.__landmark_index = None
+        self.__landmark_graph = None
 
-    def get_lowest_cost_path(self, start_vertex, end_vertex):
+    def __get_landmark_index(self):
+        """
+        :return: the landmark index of the current version of the graph and the snapshot it refers to
+        :raises GraphException if the landmarks are not enabled or the graph has negative costs
+        """
+        if self.__landmark_settings is None:
+            raise GraphException("Landmarks are not enabled!\n")
+        if self.__landmark_graph is not None and self.__landmark_graph[0] == self.__version:
+            return self.__landmark_index, self.__landmark_graph[1]
+
+        number_of_landmarks, file_name = self.__landmark_settings
+        frozen_graph = self.freeze()
+        index = None
+        if file_name is not None:
+            try:
+                index = LandmarkIndex.load(file_name)
+                if index.get_fingerprint != graph_fingerprint(frozen_graph) or \
+                        index.get_requested_landmarks != number_of_landmarks:
+                    index = None
+            except GraphException:
+                index = None
+        if index is None:
+            index = LandmarkIndex.build(frozen_graph, number_of_landmarks)
+            if file_name is not None:
+                index.save(file_name)
+
+        self.__landmark_index = index
+        self.__landmark_graph = (self.__version, frozen_graph)
+        return index, frozen_graph
+
+    def get_lowest_cost_path(self, start_vertex, end_vertex, method="backwards"):
         """
         Finds the lowest cost path between 2 vertices
         :param start_vertex: starting vertex of path
         :param end_vertex: ending vertex of path
+        :param method: "backwards" for the backwards Dijkstra algorithm, "bidirectional" for the bidirectional one,
+        "alt" for A* with the landmark lower bounds (see enable_landmarks)
+        :return: the path and its cost
+        :raises GraphException if there is no walk between the vertices or the method is unknown
         """
-        # call the function to get the distance and the next dictionary
-        dist, next = self.backwards_Dijkstra(start_vertex, end_vertex)
+        if method == "bidirectional":
+            return self.bidirectional_Dijkstra(start_vertex, end_vertex)
+        if method == "alt":
+            index, frozen_graph = self.__get_landmark_index()
+            return index.find_path(frozen_graph, start_vertex, end_vertex)
+        if method != "backwards":
+            raise GraphException("Unknown shortest path method!\n")
+
+        if self.__path_cache is not None:
+            # the whole tree rooted at end_vertex answers every later query ending in end_vertex
+            tree = self.__path_cache.get(end_vertex, self.__version)
+            if tree is None:
+                tree = self.backwards_Dijkstra(None, end_vertex)
+                self.__path_cache.put(end_vertex, self.__version, *tree)
+            dist, next = tree
+            if start_vertex not in dist:
+                raise GraphException("Nonexistent vertex!\n")
+        else:
+            # call the function to get the distance and the next dictionary
+            dist, next = self.backwards_Dijkstra(start_vertex, end_vertex)
         # we dont have a walk
         if dist[start_vertex] == 100000000001:
             raise GraphException("No walk!")
@@ -267,98 +657,429 @@ class DirectedGraph:
         path.append(end_vertex)
         return path, dist[start_vertex]
 
+    def get_lowest_cost_paths(self, pairs, max_workers=None):
+        """
+        Finds the lowest cost paths of a batch of queries; queries with the same ending vertex share one
+        backwards Dijkstra search and the searches are spread over a process pool
+        :param pairs: list of (start_vertex, end_vertex) queries
+        :param max_workers: number of worker processes, by default the number of CPUs
+        :return: list with the (path, cost) of every query, None for the queries with no walk
+        :raises GraphException if a vertex is invalid
+        """
+        return lowest_cost_paths(self, pairs, max_workers)
+
+    def get_all_pairs_lowest_costs(self, max_workers=None, file_name=None):
+        """
+        Finds the cost of the lowest cost walk between every 2 vertices with Johnson's algorithm; negative costs are
+        allowed as long as there are no negative cost cycles
+        :param max_workers: number of worker processes running the Dijkstra searches, by default the number of CPUs
+        :param file_name: if given, the distance matrix is stored in this memory-mapped file
+        :return: DistanceMatrix of the graph
+        :raises GraphException if the graph has a negative cost cycle
+        """
+        return johnson_all_pairs(self, max_workers, file_name)
+
     def backwards_Dijkstra(self, start_vertex, end_vertex=None):
         """
         Finds a lowest cost walk between the given vertices, using a "backwards" Dijkstra algorithm
+        The search stops as soon as start_vertex is settled; if start_vertex is None, the whole tree of lowest cost
+        walks ending in end_vertex is computed
         :param start_vertex: starting vertex of path
         :param end_vertex: ending vertex of path
+        :return: the distance of every vertex to end_vertex and the successor of every vertex on its walk
         """
-        q = PriorityQueue()
+        if end_vertex not in self.__inbound_neighbors:
+            raise GraphException("Nonexistent vertex!\n")
+        stats = self.__instrumentation.start("backwards_Dijkstra")
+        inbound_neighbors = self.__inbound_neighbors
         # dictionary that holds for each vertex the cost of the minimum cost walk
-        dist = {}
-        for i in range(self.__no_of_vertices):
-            dist[i] = 100000000001
+        dist = dict.fromkeys(inbound_neighbors, 100000000001)
         # dictionary that holds for each vertex its successor on the path
         next = {}
         # initialize the lowest cost walk to end_vertex with 0
         dist[end_vertex] = 0
-        # add the tuple(stance, vertex) to the priority queue
-        q.put((dist[end_vertex], end_vertex))
-
-        visited = set()
-        visited.add(end_vertex)
-        while not q.empty():
-            # get the last item from the queue
-            distance, vertex = q.get()
-
-            # go through the inbound neighbor of the vertex
-            # check if the distance is minimum
-            # if it is, add it to the path and update the distance to the vertex neighbor from the end_vertex
-            for neighbor in self.__inbound_neighbors[vertex]:
-                if neighbor not in visited or dist[neighbor] > dist[vertex] + self.__costs[(neighbor, vertex)]:
-                    dist[neighbor] = dist[vertex] + self.__costs[(neighbor, vertex)]
-                    visited.add(vertex)
-                    q.put((dist[neighbor], neighbor))
+        # binary heap of (distance, vertex) tuples; outdated entries are skipped when popped instead of being removed
+        heap = [(0, end_vertex)]
+        settled = set()
+        if stats is not None:
+            stats.heap_pushes += 1
+        while heap:
+            if stats is not None:
+                stats.frontier(len(heap))
+                stats.heap_pops += 1
+            distance, vertex = heappop(heap)
+            if vertex in settled:
+                continue
+            settled.add(vertex)
+            if vertex == start_vertex:
+                break
+
+            # go through the inbound neighbors of the vertex and relax the edges towards it
+            for neighbor, cost in inbound_neighbors[vertex].items():
+                new_distance = distance + cost
+                if new_distance < dist[neighbor] and neighbor not in settled:
+                    dist[neighbor] = new_distance
                     next[neighbor] = vertex
+                    heappush(heap, (new_distance, neighbor))
+                    if stats is not None:
+                        stats.relaxations += 1
+                        stats.heap_pushes += 1
+            if stats is not None:
+                stats.edges_scanned += len(inbound_neighbors[vertex])
+
+        if stats is not None:
+            stats.vertices_settled = len(settled)
+            stats.finish()
         return dist, next
 
-    def topological_sort_DFS(self, vertex, sorted, fully_processed, in_process):
+    def bidirectional_Dijkstra(self, start_vertex, end_vertex):
+        """
+        Finds a lowest cost walk between the given vertices by running a forward Dijkstra search from start_vertex
+        and a backwards one from end_vertex at the same time, until the two searches meet
+        :param start_vertex: starting vertex of path
+        :param end_vertex: ending vertex of path
+        :return: the path and its cost
+        :raises GraphException if there is no walk between the vertices or they are invalid
+        """
+        if start_vertex not in self.__outbound_neighbors or end_vertex not in self.__inbound_neighbors:
+            raise GraphException("Nonexistent vertex!\n")
+        stats = self.__instrumentation.start("bidirectional_Dijkstra")
+        if stats is not None:
+            stats.heap_pushes += 2
+        # index 0 - forward search over outbound neighbors, index 1 - backwards search over inbound neighbors
+        neighbors = (self.__outbound_neighbors, self.__inbound_neighbors)
+        dist = ({start_vertex: 0}, {end_vertex: 0})
+        parent = ({}, {})
+        heaps = ([(0, start_vertex)], [(0, end_vertex)])
+        settled = (set(), set())
+        best_cost = 0 if start_vertex == end_vertex else inf
+        meeting_vertex = start_vertex if start_vertex == end_vertex else None
+
+        while heaps[0] and heaps[1]:
+            # no walk through unsettled vertices can be cheaper than the best one found so far
+            if heaps[0][0][0] + heaps[1][0][0] >= best_cost:
+                break
+            # advance the search with the smaller frontier
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            if stats is not None:
+                stats.frontier(len(heaps[0]) + len(heaps[1]))
+                stats.heap_pops += 1
+            distance, vertex = heappop(heaps[side])
+            if vertex in settled[side]:
+                continue
+            settled[side].add(vertex)
+            if stats is not None:
+                stats.edges_scanned += len(neighbors[side][vertex])
+
+            own_dist = dist[side]
+            other_dist = dist[1 - side]
+            for neighbor, cost in neighbors[side][vertex].items():
+                new_distance = distance + cost
+                if new_distance < own_dist.get(neighbor, inf):
+                    own_dist[neighbor] = new_distance
+                    parent[side][neighbor] = vertex
+                    heappush(heaps[side], (new_distance, neighbor))
+                    if stats is not None:
+                        stats.relaxations += 1
+                        stats.heap_pushes += 1
+                if neighbor in other_dist and own_dist[neighbor] + other_dist[neighbor] < best_cost:
+                    best_cost = own_dist[neighbor] + other_dist[neighbor]
+                    meeting_vertex = neighbor
+
+        if stats is not None:
+            stats.vertices_settled = len(settled[0]) + len(settled[1])
+            stats.finish()
+        if meeting_vertex is None:
+            raise GraphException("No walk!")
+
+        # form the path: start_vertex -> meeting_vertex from the forward parents, then up to end_vertex
+        path = [meeting_vertex]
+        while path[-1] != start_vertex:
+            path.append(parent[0][path[-1]])
+        path.reverse()
+        v = meeting_vertex
+        while v != end_vertex:
+            v = parent[1][v]
+            path.append(v)
+
+        return path, best_cost
+
+    def topological_sort_DFS(self, vertex, sorted, fully_processed, in_process, cycle=None, stats=None):
         """
         Performs a topological sorting of the activities using the algorithm based on depth-first traversal (Tarjan's algorithm)
+        The traversal uses an explicit stack instead of recursion, so long chains don't hit the recursion limit
         :param vertex: starting vertex
         :param sorted: list of sorted vertices
-        :param fully_processed: list of fully processed vertices
-        :param in_process: list of vertices which are currently in process
+        :param fully_processed: set of fully processed vertices
+        :param in_process: set of vertices which are currently in process
+        :param cycle: list which receives the vertices of the cycle that was found, if any
+        :param stats: AlgorithmStats updated by the traversal, if any
+        :return: true if no cycle was found, false otherwise
         """
+        inbound_neighbors = self.__inbound_neighbors
         in_process.add(vertex)
-        for inbound_neighbour in self.parse_inbound_neighbors(vertex):
-            if inbound_neighbour in in_process:
-                return False
-            else:
+        # every entry is a vertex on the current DFS path and the iterator over its remaining inbound neighbors
+        stack = [(vertex, iter(inbound_neighbors[vertex]))]
+        while stack:
+            current, neighbors = stack[-1]
+            for inbound_neighbour in neighbors:
+                if stats is not None:
+                    stats.edges_scanned += 1
+                if inbound_neighbour in in_process:
+                    if cycle is not None:
+                        # the path on the stack goes backwards along the edges, from inbound_neighbour to current
+                        path = [entry[0] for entry in stack]
+                        cycle.extend(reversed(path[path.index(inbound_neighbour):]))
+                        cycle.append(current)
+                    return False
                 if inbound_neighbour not in fully_processed:
-                    ok = self.topological_sort_DFS(inbound_neighbour, sorted, fully_processed, in_process)
-                    if not ok:
-                        print(sorted)
-                        return False
-
-        in_process.remove(vertex)
-        sorted.append(vertex)
-        fully_processed.add(vertex)
+                    in_process.add(inbound_neighbour)
+                    stack.append((inbound_neighbour, iter(inbound_neighbors[inbound_neighbour])))
+                    if stats is not None:
+                        stats.frontier(len(stack))
+                    break
+            else:
+                stack.pop()
+                in_process.remove(current)
+                sorted.append(current)
+                fully_processed.add(current)
+                if stats is not None:
+                    stats.vertices_settled += 1
         return True
 
-    def DAG(self):
+    def topological_sort_Kahn(self, cycle=None, stats=None):
         """
-        Verifies if the corresponding graph is a DAG (Directed Acyclic Graph)
+        Performs a topological sorting of the activities with Kahn's algorithm, repeatedly removing the vertices
+        that have no remaining inbound edges
+        :param cycle: list which receives the vertices of a cycle, if the graph has one
+        :param stats: AlgorithmStats updated by the sorting, if any
+        :return: list of sorted vertices, None if the graph has a cycle
         """
+        in_degree = {vertex: len(neighbors) for vertex, neighbors in self.__inbound_neighbors.items()}
+        ready = deque(vertex for vertex, degree in in_degree.items() if degree == 0)
         sorted = []
-        fully_processed = set()
-        in_process = set()
-        for vertex in self.parse_dictionary_keys():
-            if vertex not in fully_processed:
-                ok = self.topological_sort_DFS(vertex, sorted, fully_processed, in_process)
-                if not ok:
-                    return []
-        return sorted[:]
+        while ready:
+            if stats is not None:
+                stats.frontier(len(ready))
+                stats.edges_scanned += len(self.__outbound_neighbors[ready[0]])
+            vertex = ready.popleft()
+            sorted.append(vertex)
+            for outbound_neighbour in self.__outbound_neighbors[vertex]:
+                in_degree[outbound_neighbour] -= 1
+                if in_degree[outbound_neighbour] == 0:
+                    ready.append(outbound_neighbour)
+
+        if stats is not None:
+            stats.vertices_settled = len(sorted)
+        if len(sorted) == len(in_degree):
+            return sorted
+        if cycle is not None:
+            # every vertex left has an inbound neighbour which is also left, so walking backwards closes a cycle
+            vertex = next(vertex for vertex, degree in in_degree.items() if degree > 0)
+            position = {}
+            path = []
+            while vertex not in position:
+                position[vertex] = len(path)
+                path.append(vertex)
+                vertex = next(neighbour for neighbour in self.__inbound_neighbors[vertex] if in_degree[neighbour] > 0)
+            cycle.extend(reversed(path[position[vertex]:]))
+            cycle.append(cycle[0])
+        return None
+
+    def topological_sort(self, method="dfs"):
+        """
+        Performs a topological sorting of the vertices
+        :param method: "dfs" for the depth-first traversal algorithm, "kahn" for Kahn's algorithm
+        :return: tuple (true, sorted vertices) if the graph is a DAG, (false, vertices of a cycle) otherwise;
+        the cycle is given in the direction of its edges and ends with its first vertex
+        :raises GraphException if the method is unknown
+        """
+        if method not in ("dfs", "kahn"):
+            raise GraphException("Unknown topological sort method!\n")
+        stats = self.__instrumentation.start("topological_sort_" + method)
+        cycle = []
+        if method == "kahn":
+            sorted = self.topological_sort_Kahn(cycle, stats)
+            result = (True, sorted) if sorted is not None else (False, cycle)
+        else:
+            sorted = []
+            fully_processed = set()
+            in_process = set()
+            result = (True, sorted)
+            for vertex in self.__inbound_neighbors:
+                if vertex not in fully_processed:
+                    if not self.topological_sort_DFS(vertex, sorted, fully_processed, in_process, cycle, stats):
+                        result = (False, cycle)
+                        break
+
+        if stats is not None:
+            stats.finish()
+        return result
+
+    def DAG(self, method="dfs"):
+        """
+        Verifies if the corresponding graph is a DAG (Directed Acyclic Graph)
+        :param method: "dfs" for the depth-first traversal algorithm, "kahn" for Kahn's algorithm
+        :return: the topologically sorted vertices if the graph is a DAG, an empty list otherwise
+        """
+        is_dag, sorted = self.topological_sort(method)
+        if not is_dag:
+            return []
+        return sorted
+
+    def get_weakly_connected_components(self, use_numpy=None):
+        """
+        Finds the weakly connected components of the graph: the connected components when the direction of the edges
+        is ignored
+        :param use_numpy: True, False, or None to use NumPy frontier arrays on large graphs when NumPy is installed
+        :return: a list of all the weakly connected components
+        """
+        stats = self.__instrumentation.start("weakly_connected_components")
+        inbound_neighbors = self.__inbound_neighbors
+        neighbors = {vertex: {**outbound, **inbound_neighbors[vertex]}
+                     for vertex, outbound in self.__outbound_neighbors.items()}
+        components = connected_components(neighbors, use_numpy, stats)
+        if stats is not None:
+            stats.finish()
+        return components
+
+    def enable_online_topological_order(self):
+        """
+        Enables the maintenance of a topological order while the graph is edited: every new edge only reorders the
+        vertices between its ends (Pearce-Kelly algorithm), and an edge that would close a cycle is rejected
+        :raises GraphException if the graph is not a DAG
+        """
+        is_dag, order = self.topological_sort()
+        if not is_dag:
+            raise GraphException("Given graph is not DAG!\n")
+        self.__set_topological_order(order)
+
+    def disable_online_topological_order(self):
+        """
+        Disables the maintenance of the topological order
+        """
+        self.__topological_order = None
+        self.__topological_position = None
+
+    def get_topological_order(self):
+        """
+        :return: the maintained topological order of the vertices, None if the online order isn't enabled
+        """
+        if self.__topological_order is None:
+            return None
+        return [vertex for vertex in self.__topological_order if vertex is not None]
+
+    def __set_topological_order(self, order):
+        """
+        Replaces the maintained topological order with the given one
+        """
+        self.__topological_order = list(order)
+        self.__topological_position = {vertex: position for position, vertex in enumerate(self.__topological_order)}
+
+    def __reorder_for_edge(self, start_vertex, end_vertex):
+        """
+        Updates the maintained topological order for a new edge (start_vertex, end_vertex), before it is added
+        :raises GraphException if the edge would close a cycle
+        """
+        position = self.__topological_position
+        lower_bound = position[end_vertex]
+        upper_bound = position[start_vertex]
+        if upper_bound < lower_bound:
+            return
+
+        # vertices reachable from end_vertex that are placed before start_vertex
+        forward = self.__collect_affected(end_vertex, self.__outbound_neighbors,
+                                          lambda vertex: position[vertex] <= upper_bound)
+        if start_vertex in forward:
+            raise GraphException("Edge would close a cycle!\n")
+        # vertices that reach start_vertex and are placed after end_vertex
+        backward = self.__collect_affected(start_vertex, self.__inbound_neighbors,
+                                           lambda vertex: position[vertex] >= lower_bound)
+
+        # the backward vertices take the first of the freed positions, then the forward ones, each keeping its order
+        backward.sort(key=position.__getitem__)
+        forward.sort(key=position.__getitem__)
+        affected = backward + forward
+        positions = sorted(position[vertex] for vertex in affected)
+        for vertex, new_position in zip(affected, positions):
+            position[vertex] = new_position
+            self.__topological_order[new_position] = vertex
+
+    @staticmethod
+    def __collect_affected(source, neighbors, in_region):
+        """
+        :return: list of the vertices reachable from source through the given adjacency without leaving the region
+        """
+        visited = {source}
+        stack = [source]
+        while stack:
+            vertex = stack.pop()
+            for neighbour in neighbors[vertex]:
+                if neighbour not in visited and in_region(neighbour):
+                    visited.add(neighbour)
+                    stack.append(neighbour)
+        return list(visited)
 
     def highest_cost_path(self, sorted, start_vertex, end_vertex):
         """
         Finds a highest cost path between two given vertices
-        :param sorted: list of sorted vertices
+        :param sorted: list of sorted vertices; if None, the maintained online topological order is used
         :param start_vertex: starting vertex
         :param end_vertex: ending vertex
-        :return:
+        :return: the cost of the path and a read-only mapping with the predecessor of every vertex on it (-1 for the
+        unreached vertices)
+        :raises GraphException if start_vertex or end_vertex doesn't exist in the graph
         """
-        distances = [-inf] * len(sorted)
-        prev = [-1] * len(sorted)
-        distances[start_vertex] = 0
-        for vertex in sorted:
-            if vertex == end_vertex:
-                break
-            for outbound_neighbour in self.parse_outbound_neighbors(vertex):
-                if distances[outbound_neighbour] < distances[vertex] + self.get_cost_of_edge(vertex, outbound_neighbour):
-                    distances[outbound_neighbour] = distances[vertex] + self.get_cost_of_edge(vertex, outbound_neighbour)
-                    prev[outbound_neighbour] = vertex
-        return distances[end_vertex], prev[:]
+        if sorted is None:
+            sorted = self.get_topological_order()
+            if sorted is None:
+                raise GraphException("Online topological order is not enabled!\n")
+        index = self.__get_dense_index()
+        end_slot = index.slot_of(end_vertex)
+        start_slot = index.slot_of(start_vertex)
+        stats = self.__instrumentation.start("highest_cost_path")
+        distances = [-inf] * index.get_size
+        prev = [-1] * index.get_size
+        distances[start_slot] = 0
+        if index.get_identity:
+            # the vertices are 0..n-1, so they index the lists directly
+            for vertex in sorted:
+                if vertex == end_vertex:
+                    break
+                if stats is not None:
+                    stats.vertices_settled += 1
+                    stats.edges_scanned += len(self.__outbound_neighbors[vertex])
+                for outbound_neighbour, cost in self.__outbound_neighbors[vertex].items():
+                    if distances[outbound_neighbour] < distances[vertex] + cost:
+                        distances[outbound_neighbour] = distances[vertex] + cost
+                        prev[outbound_neighbour] = vertex
+                        if stats is not None:
+                            stats.relaxations += 1
+            predecessors = DenseValues(None, prev)
+        else:
+            # the vertex ids have gaps: the lists are indexed by the dense slot of every vertex
+            slots = index.get_slots
+            for vertex in sorted:
+                slot = slots[vertex]
+                if slot == end_slot:
+                    break
+                if distances[slot] == -inf:
+                    continue
+                if stats is not None:
+                    stats.vertices_settled += 1
+                    stats.edges_scanned += len(self.__outbound_neighbors[vertex])
+                for outbound_neighbour, cost in self.__outbound_neighbors[vertex].items():
+                    neighbour_slot = slots[outbound_neighbour]
+                    if distances[neighbour_slot] < distances[slot] + cost:
+                        distances[neighbour_slot] = distances[slot] + cost
+                        prev[neighbour_slot] = vertex
+                        if stats is not None:
+                            stats.relaxations += 1
+            # the slots are copied, as later changes of the graph renumber them
+            predecessors = DenseValues(dict(slots), prev)
+        if stats is not None:
+            stats.finish()
+        return distances[end_slot], predecessors
 
     def bellman_ford(self, start_vertex, max_length):
         """
@@ -366,20 +1087,92 @@ class DirectedGraph:
         :param start_vertex: starting vertex
         :param max_length: maximum length of the path
         :return: all the possible distances with length < max_length
+        :raises GraphException if start_vertex doesn't exist in the graph
         """
-        # initial_dict = {start_vertex: 0}
-        initial_dict = dict.fromkeys(range(start_vertex + 1), 0)
+        if start_vertex not in self.__outbound_neighbors:
+            raise GraphException("Nonexistent vertex!\n")
+        stats = self.__instrumentation.start("bellman_ford")
+        # only the source is at distance 0 with a walk of length 0
+        initial_dict = {start_vertex: 0}
         distances = [initial_dict]
         for k in range(1, max_length + 1):
             previous_dict = distances[k - 1]
             current_dict = {}
             for vertex1 in previous_dict:
-                for vertex2 in self.parse_outbound_neighbors(vertex1):
-                    if vertex2 not in current_dict or current_dict[vertex2] > previous_dict[vertex1] + self.get_cost_of_edge(vertex1, vertex2):
-                        current_dict[vertex2] = previous_dict[vertex1] + self.get_cost_of_edge(vertex1, vertex2)
+                edges = self.parse_outbound_edges(vertex1)
+                if stats is not None:
+                    stats.vertices_settled += 1
+                    stats.edges_scanned += len(edges)
+                for vertex2, cost in edges:
+                    if vertex2 not in current_dict or current_dict[vertex2] > previous_dict[vertex1] + cost:
+                        current_dict[vertex2] = previous_dict[vertex1] + cost
+                        if stats is not None:
+                            stats.relaxations += 1
             distances.append(current_dict)
+            if stats is not None:
+                stats.frontier(len(current_dict))
+        if stats is not None:
+            stats.finish()
         return distances
 
+    def spfa(self, start_vertex):
+        """
+        Queue-based Bellman Ford algorithm (SPFA): every pass only relaxes the outbound edges of the vertices whose
+        distance changed in the previous pass, and the search stops as soon as a pass changes nothing
+        Only one distance and one predecessor are kept per vertex, so the memory used is O(n)
+        :param start_vertex: starting vertex
+        :return: tuple (distances, predecessors, cycle): the distance and predecessor of every vertex reachable from
+        start_vertex, and a negative cost cycle reachable from start_vertex (None if there is none), given in the
+        direction of its edges and ending with its first vertex
+        :raises GraphException if start_vertex is invalid
+        """
+        if start_vertex not in self.__outbound_neighbors:
+            raise GraphException("Nonexistent vertex!\n")
+        stats = self.__instrumentation.start("spfa")
+        outbound_neighbors = self.__outbound_neighbors
+        dist = {start_vertex: 0}
+        prev = {}
+        # dictionary used as an insertion-ordered set of the vertices to scan in the current pass
+        queue = {start_vertex: None}
+        for k in range(len(outbound_neighbors)):
+            changed = {}
+            if stats is not None:
+                stats.frontier(len(queue))
+                stats.vertices_settled += len(queue)
+            for vertex in queue:
+                distance = dist[vertex]
+                if stats is not None:
+                    stats.edges_scanned += len(outbound_neighbors[vertex])
+                for neighbor, cost in outbound_neighbors[vertex].items():
+                    new_distance = distance + cost
+                    if new_distance < dist.get(neighbor, inf):
+                        dist[neighbor] = new_distance
+                        prev[neighbor] = vertex
+                        changed[neighbor] = None
+                        if stats is not None:
+                            stats.relaxations += 1
+            if not changed:
+                if stats is not None:
+                    stats.finish()
+                return dist, prev, None
+            queue = changed
+
+        # distances still change after n passes, so a vertex changed in the last pass is reached through a negative
+        # cycle; going back n times along the predecessors surely lands on that cycle
+        vertex = next(iter(queue))
+        for k in range(len(outbound_neighbors)):
+            vertex = prev[vertex]
+        cycle = [vertex]
+        predecessor = prev[vertex]
+        while predecessor != vertex:
+            cycle.append(predecessor)
+            predecessor = prev[predecessor]
+        cycle.reverse()
+        cycle.append(cycle[0])
+        if stats is not None:
+            stats.finish()
+        return dist, prev, cycle
+
     def min_cost_path_neg_cycle(self, distances, start_vertex, end_vertex, length):
         """
         Finds the minimum cost path between 2 vertices with given length
@@ -389,9 +1182,9 @@ class DirectedGraph:
         current_length = length
         while current_length > 0:
             walk.insert(0, current_vertex)
-            for previous_vertex in self.parse_inbound_neighbors(current_vertex):
+            for previous_vertex, cost in self.parse_inbound_edges(current_vertex):
                 if previous_vertex in distances[current_length - 1] and distances[current_length - 1][previous_vertex] + \
-                        self.get_cost_of_edge(previous_vertex, current_vertex) == distances[current_length][current_vertex]:
+                        cost == distances[current_length][current_vertex]:
                     current_vertex = previous_vertex
                     break
             current_length -= 1
@@ -0,0 +1,248 @@
+from collections import deque
+
+
+class DisjointSet:
+    """
+    Disjoint-set forest (union-find) with path compression and union by rank: find and union run in amortized
+    near-constant time.
+    """
+    def __init__(self, elements=()):
+        self.__parent = {element: element for element in elements}
+        self.__rank = {}
+        self.__count = len(self.__parent)
+
+    @property
+    def get_count(self):
+        """
+        :return: number of disjoint sets
+        """
+        return self.__count
+
+    def __contains__(self, element):
+        return element in self.__parent
+
+    def add(self, element):
+        """
+        Adds a new element, in a set of its own
+        """
+        if element not in self.__parent:
+            self.__parent[element] = element
+            self.__count += 1
+
+    def find(self, element):
+        """
+        :return: the representative of the set containing the element
+        :raises KeyError if the element doesn't exist
+        """
+        parent = self.__parent
+        root = element
+        while parent[root] != root:
+            root = parent[root]
+        # path compression: every element on the path now points directly to the root
+        while parent[element] != root:
+            parent[element], element = root, parent[element]
+
+        return root
+
+    def union(self, element1, element2):
+        """
+        Merges the sets containing the 2 elements
+        :return: true if 2 different sets were merged, false if the elements were already in the same set
+        """
+        root1 = self.find(element1)
+        root2 = self.find(element2)
+        if root1 == root2:
+            return False
+
+        # union by rank: the shallower tree is attached under the root of the deeper one
+        rank1 = self.__rank.get(root1, 0)
+        rank2 = self.__rank.get(root2, 0)
+        if rank1 < rank2:
+            root1, root2 = root2, root1
+        self.__parent[root2] = root1
+        if rank1 == rank2:
+            self.__rank[root1] = rank1 + 1
+        self.__count -= 1
+
+        return True
+
+
+class ConnectedComponents:
+    """
+    Connected components of an undirected graph under insertions and deletions, kept in a DisjointSet.
+    Insertions are unions. Deletions are only recorded: every piece of a component broken by deletions contains an
+    endpoint of a removed edge or a neighbor of a removed vertex (a seed), so on the next query the pieces are found
+    by interleaved searches from the seeds, which stop as soon as a single search is left running; the vertices of
+    the finished pieces move to new sets, so a deletion costs about the size of the smaller pieces, not of the graph.
+    Every vertex is represented in the DisjointSet by an integer handle; the old handles of the moved vertices stay
+    in their former trees as ghosts until there are more ghosts than vertices and the structure is compacted.
+    """
+    def __init__(self, vertices=(), edges=()):
+        self.__handles = {}
+        self.__sets = DisjointSet()
+        self.__next_handle = 0
+        self.__count = 0
+        self.__ghosts = 0
+        self.__seeds = {}
+        self.__removed = []
+        for vertex in vertices:
+            self.add(vertex)
+        for start_vertex, end_vertex in edges:
+            self.union(start_vertex, end_vertex)
+
+    @property
+    def get_count(self):
+        """
+        :return: number of connected components; only up to date after refresh
+        """
+        return self.__count
+
+    def __new_handle(self, vertex):
+        handle = self.__next_handle
+        self.__next_handle += 1
+        self.__handles[vertex] = handle
+        self.__sets.add(handle)
+        return handle
+
+    def add(self, vertex):
+        """
+        Adds a new isolated vertex
+        """
+        self.__new_handle(vertex)
+        self.__count += 1
+
+    def union(self, start_vertex, end_vertex):
+        """
+        Records a new edge, merging the components of its endpoints
+        """
+        if self.__sets.union(self.__handles[start_vertex], self.__handles[end_vertex]):
+            self.__count -= 1
+
+    def edge_removed(self, start_vertex, end_vertex):
+        """
+        Records the removal of an edge
+        """
+        self.__seeds[start_vertex] = None
+        self.__seeds[end_vertex] = None
+
+    def vertex_removed(self, vertex, neighbors):
+        """
+        Records the removal of a vertex, before its edges are removed from the graph
+        :param neighbors: neighbors of the removed vertex
+        """
+        self.__seeds.update(dict.fromkeys(neighbors))
+        self.__removed.append(self.__handles.pop(vertex))
+
+    def find(self, vertex):
+        """
+        :return: id of the component of the vertex; only up to date after refresh
+        """
+        return self.__sets.find(self.__handles[vertex])
+
+    def refresh(self, neighbors):
+        """
+        Splits the components broken by the deletions recorded since the last refresh
+        :param neighbors: dictionary with the neighbors of every vertex of the graph
+        """
+        if not self.__seeds and not self.__removed:
+            return
+
+        # the seeds of the same old component are searched together
+        groups = {}
+        for seed in self.__seeds:
+            if seed in self.__handles:
+                groups.setdefault(self.find(seed), []).append(seed)
+        # a component whose vertices were all removed has no seeds left
+        vanished = {self.__sets.find(handle) for handle in self.__removed} - groups.keys()
+        self.__count -= len(vanished)
+        self.__ghosts += len(self.__removed)
+        self.__seeds = {}
+        self.__removed = []
+
+        for seeds in groups.values():
+            if len(seeds) > 1:
+                for piece in self.__split_pieces(neighbors, seeds):
+                    for vertex in piece:
+                        self.__new_handle(vertex)
+                    for vertex in piece[1:]:
+                        self.__sets.union(self.__handles[piece[0]], self.__handles[vertex])
+                    self.__count += 1
+                    self.__ghosts += len(piece)
+
+        if self.__ghosts > len(self.__handles):
+            self.__compact()
+
+    @staticmethod
+    def __split_pieces(neighbors, seeds):
+        """
+        Breadth-first searches from all the seeds, advanced one vertex at a time in turn; 2 searches that meet are
+        merged, and a search that runs out of vertices has found a whole piece
+        :return: lists of the vertices of all the pieces but one
+        """
+        owner = {}
+        merged_into = {}
+        queues = []
+        members = []
+        for index, seed in enumerate(seeds):
+            owner[seed] = index
+            queues.append(deque([seed]))
+            members.append([seed])
+        running = dict.fromkeys(range(len(seeds)))
+        finished = []
+
+        def leader(index):
+            while index in merged_into:
+                index = merged_into[index]
+            return index
+
+        while len(running) > 1:
+            for index in list(running):
+                if index not in running:
+                    continue
+                if not queues[index]:
+                    del running[index]
+                    finished.append(index)
+                    continue
+                vertex = queues[index].popleft()
+                for neighbor in neighbors[vertex]:
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = index
+                        queues[index].append(neighbor)
+                        members[index].append(neighbor)
+                        continue
+                    other = leader(other)
+                    if other != index:
+                        # the smaller search is appended to the bigger one
+                        if len(members[other]) > len(members[index]):
+                            members[index], members[other] = members[other], members[index]
+                            queues[index], queues[other] = queues[other], queues[index]
+                        members[index].extend(members[other])
+                        queues[index].extend(queues[other])
+                        members[other] = queues[other] = None
+                        merged_into[other] = index
+                        del running[other]
+
+        # when every search finished, the biggest piece keeps the old set
+        if not running:
+            finished.remove(max(finished, key=lambda index: len(members[index])))
+        return [members[index] for index in finished]
+
+    def __compact(self):
+        """
+        Rebuilds the DisjointSet without the ghost handles
+        """
+        old_sets = self.__sets
+        old_handles = self.__handles
+        self.__sets = DisjointSet()
+        self.__handles = {}
+        self.__next_handle = 0
+        self.__ghosts = 0
+        first = {}
+        for vertex, handle in old_handles.items():
+            root = old_sets.find(handle)
+            self.__new_handle(vertex)
+            if root in first:
+                self.__sets.union(self.__handles[first[root]], self.__handles[vertex])
+            else:
+                first[root] = vertex
@@ -0,0 +1,446 @@
+from graphIO import *
+from array import array
+from collections import OrderedDict
+from heapq import heappush, heappop, merge
+import os
+import shutil
+import tempfile
+
+# number of edges sorted in memory at once when building a disk graph; every sorted run is written to a temporary file
+RUN_EDGES = 1 << 20
+# (key vertex, other vertex, cost) record of the temporary run files
+RUN_RECORD = struct.Struct("=qqq")
+# number of records read from a run file or buffered for an output file at once
+IO_RECORDS = 1 << 14
+# size of a page of the page cache, in bytes
+PAGE_SIZE = 1 << 16
+# default number of pages kept by the page cache
+DEFAULT_CACHE_PAGES = 1024
+
+
+def write_run(records, file_name):
+    """
+    Sorts a run of (key vertex, other vertex, cost) records and writes it to a temporary file
+    """
+    records.sort()
+    with open(file_name, "wb") as f:
+        for start in range(0, len(records), IO_RECORDS):
+            f.write(b"".join(RUN_RECORD.pack(*record) for record in records[start:start + IO_RECORDS]))
+
+
+def read_run(file_name):
+    """
+    :return: generator yielding the records of a run file, in order
+    """
+    with open(file_name, "rb") as f:
+        while True:
+            block = f.read(RUN_RECORD.size * IO_RECORDS)
+            if not block:
+                return
+            yield from RUN_RECORD.iter_unpack(block)
+
+
+def write_adjacency(records, number_of_slots, offsets_file, ends_file, costs_file):
+    """
+    Writes one side (outbound or inbound) of the CSR arrays from a stream of records sorted by key vertex
+    :param records: iterable of (key vertex, other vertex, cost) records, sorted; the vertices are slots
+    :param number_of_slots: number of vertices of the graph
+    :raises GraphException if an edge appears twice
+    """
+    offsets = array("q", [0])
+    ends = array("q")
+    costs = array("q")
+    slot = 0
+    position = 0
+    previous = None
+    for key, other, cost in records:
+        if (key, other) == previous:
+            raise GraphException("Edge already exists in the graph!\n")
+        previous = (key, other)
+        # the vertices before key have all their edges written
+        while slot < key:
+            offsets.append(position)
+            slot += 1
+        ends.append(other)
+        costs.append(cost)
+        position += 1
+        if len(ends) >= IO_RECORDS:
+            offsets.tofile(offsets_file)
+            ends.tofile(ends_file)
+            costs.tofile(costs_file)
+            offsets = array("q")
+            ends = array("q")
+            costs = array("q")
+    while slot < number_of_slots:
+        offsets.append(position)
+        slot += 1
+    offsets.tofile(offsets_file)
+    ends.tofile(ends_file)
+    costs.tofile(costs_file)
+
+
+def convert_text_to_disk_graph(text_file_name, disk_file_name, run_edges=RUN_EDGES, temp_dir=None):
+    """
+    Converts a graph in the text format to the binary format with an external merge sort, so that only run_edges edges
+    are held in memory at once: the edges are sorted by start vertex and by end vertex in runs, the runs are merged
+    and the arrays of the binary format are written one after another. The edges must join vertices in 0..n-1;
+    isolated vertices outside this range are kept.
+    :param text_file_name: name of the input file
+    :param disk_file_name: name of the output file, which can be opened by DiskGraph or load_binary_graph
+    :param run_edges: number of edges sorted in memory at once
+    :param temp_dir: directory of the temporary files, by default the one of the output file
+    :raises GraphException if the input file is malformed or an edge is invalid
+    """
+    work_dir = tempfile.mkdtemp(dir=temp_dir if temp_dir is not None else os.path.dirname(disk_file_name) or ".")
+    try:
+        blocks = iterate_text_graph(text_file_name)
+        number_of_vertices, number_of_edges = next(blocks)
+        extra_vertices = set()
+        out_runs = []
+        in_runs = []
+        out_records = []
+        in_records = []
+        edges_read = 0
+        for edges, isolated in blocks:
+            for vertex in isolated:
+                if not 0 <= vertex < number_of_vertices:
+                    extra_vertices.add(vertex)
+            for start_vertex, end_vertex, cost in edges:
+                if not (0 <= start_vertex < number_of_vertices and 0 <= end_vertex < number_of_vertices):
+                    raise GraphException("Nonexistent vertex!\n")
+                out_records.append((start_vertex, end_vertex, cost))
+                in_records.append((end_vertex, start_vertex, cost))
+            edges_read += len(edges)
+            if len(out_records) >= run_edges:
+                out_runs.append(os.path.join(work_dir, "out%d" % len(out_runs)))
+                write_run(out_records, out_runs[-1])
+                in_runs.append(os.path.join(work_dir, "in%d" % len(in_runs)))
+                write_run(in_records, in_runs[-1])
+                out_records = []
+                in_records = []
+        if any(vertex < 0 for vertex in extra_vertices):
+            raise GraphException("Nonexistent vertex!\n")
+        # a vertex is its own slot; the isolated vertices beyond n - 1 take the slots after n - 1 in increasing order
+        extra_vertices = sorted(extra_vertices)
+        number_of_slots = number_of_vertices + len(extra_vertices)
+        out_records.sort()
+        in_records.sort()
+
+        # the 6 arrays after the vertices are written to their own files, then appended to the output file
+        parts = [os.path.join(work_dir, name) for name in
+                 ("out_offsets", "out_targets", "out_costs", "in_offsets", "in_sources", "in_costs")]
+        files = [open(part, "wb") for part in parts]
+        try:
+            write_adjacency(merge(out_records, *map(read_run, out_runs)), number_of_slots, *files[:3])
+            write_adjacency(merge(in_records, *map(read_run, in_runs)), number_of_slots, *files[3:])
+        finally:
+            for f in files:
+                f.close()
+
+        with open(disk_file_name, "wb") as f:
+            f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, sys.byteorder[0].encode(), b"q",
+                                       number_of_slots, edges_read))
+            for start in range(0, number_of_vertices, IO_RECORDS):
+                array("q", range(start, min(start + IO_RECORDS, number_of_vertices))).tofile(f)
+            array("q", extra_vertices).tofile(f)
+            for part in parts:
+                with open(part, "rb") as source:
+                    shutil.copyfileobj(source, f)
+    except IOError:
+        raise GraphException("Error writing output file!\n")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+class DiskGraph:
+    """
+    Read-only directed graph stored in a file of the binary format (see convert_text_to_disk_graph and
+    save_binary_graph), for graphs that don't fit in memory. The file is memory-mapped and only the byte ranges
+    an operation needs are read, through an LRU cache of fixed-size pages, so the memory used is bounded by the
+    cache size instead of the size of the graph.
+    """
+    def __init__(self, file_name, cache_pages=DEFAULT_CACHE_PAGES):
+        try:
+            with open(file_name, "rb") as f:
+                self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, ValueError):
+            raise GraphException("Error reading input file!\n")
+        if len(self.__map) < BINARY_HEADER.size:
+            raise GraphException("Invalid binary graph file!\n")
+        magic, version, byte_order, cost_type, number_of_vertices, number_of_edges = \
+            BINARY_HEADER.unpack_from(self.__map)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise GraphException("Invalid binary graph file!\n")
+        if byte_order != sys.byteorder[0].encode():
+            raise GraphException("Binary graph file was written on a machine with a different byte order!\n")
+        if len(self.__map) != BINARY_HEADER.size + FrozenDirectedGraph.buffer_size(number_of_vertices,
+                                                                                     number_of_edges):
+            raise GraphException("Invalid binary graph file!\n")
+
+        self.__no_of_vertices = number_of_vertices
+        self.__no_of_edges = number_of_edges
+        cost_type = cost_type.decode()
+        # byte offset of the first item of every array in the file
+        offset = BINARY_HEADER.size
+        self.__vertices = offset
+        offset += 8 * number_of_vertices
+        self.__out_offsets = offset
+        offset += 8 * (number_of_vertices + 1)
+        self.__out_targets = offset
+        offset += 8 * number_of_edges
+        self.__out_costs = offset
+        offset += 8 * number_of_edges
+        self.__in_offsets = offset
+        offset += 8 * (number_of_vertices + 1)
+        self.__in_sources = offset
+        offset += 8 * number_of_edges
+        self.__in_costs = offset
+        self.__cost_type = cost_type
+
+        self.__max_pages = max(cache_pages, 1)
+        self.__pages = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        # when the vertices are exactly 0..n-1, a vertex is its own slot and no lookup is needed
+        self.__identity = number_of_vertices == 0 or \
+            (self.__read(self.__vertices, 0, 1)[0] == 0 and
+             self.__read(self.__vertices, number_of_vertices - 1, number_of_vertices)[0] == number_of_vertices - 1)
+
+    @property
+    def get_no_of_vertices(self):
+        """
+        :return: number of vertices of the graph
+        """
+        return self.__no_of_vertices
+
+    @property
+    def get_no_of_edges(self):
+        """
+        :return: number of edges of the graph
+        """
+        return self.__no_of_edges
+
+    @property
+    def get_cache_statistics(self):
+        """
+        :return: dictionary with the hits, misses and evictions of the page cache and the number of cached pages
+        """
+        return {
+            "hits": self.__hits,
+            "misses": self.__misses,
+            "evictions": self.__evictions,
+            "pages": len(self.__pages),
+            "max_pages": self.__max_pages,
+            "page_size": PAGE_SIZE
+        }
+
+    def close(self):
+        self.__pages.clear()
+        self.__map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __page(self, number):
+        """
+        :return: the bytes of the given page of the file, from the cache if it is there
+        """
+        page = self.__pages.get(number)
+        if page is not None:
+            self.__hits += 1
+            self.__pages.move_to_end(number)
+            return page
+        self.__misses += 1
+        page = self.__map[number * PAGE_SIZE:(number + 1) * PAGE_SIZE]
+        self.__pages[number] = page
+        if len(self.__pages) > self.__max_pages:
+            self.__pages.popitem(last=False)
+            self.__evictions += 1
+        return page
+
+    def __read(self, array_offset, start, stop, typecode="q"):
+        """
+        Reads items start..stop - 1 of one of the arrays of the file through the page cache
+        :param array_offset: byte offset of the array in the file
+        :return: sequence of the items
+        """
+        if stop <= start:
+            return array(typecode)
+        begin = array_offset + 8 * start
+        end = array_offset + 8 * stop
+        first_page = begin // PAGE_SIZE
+        last_page = (end - 1) // PAGE_SIZE
+        if first_page == last_page:
+            # a view of the cached page, without copying it
+            data = memoryview(self.__page(first_page))[begin - first_page * PAGE_SIZE:end - first_page * PAGE_SIZE]
+        else:
+            data = b"".join(self.__page(number) for number in range(first_page, last_page + 1))
+            data = data[begin - first_page * PAGE_SIZE:end - first_page * PAGE_SIZE]
+        return memoryview(data).cast(typecode)
+
+    def __slot_of(self, vertex):
+        """
+        :return: the slot of the given vertex, found by binary search over the sorted vertices of the file
+        :raises GraphException if vertex is invalid
+        """
+        if self.__identity:
+            if isinstance(vertex, int) and 0 <= vertex < self.__no_of_vertices:
+                return vertex
+            raise GraphException("Nonexistent vertex!\n")
+        low = 0
+        high = self.__no_of_vertices
+        while low < high:
+            middle = (low + high) // 2
+            if self.__read(self.__vertices, middle, middle + 1)[0] < vertex:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.__no_of_vertices and self.__read(self.__vertices, low, low + 1)[0] == vertex:
+            return low
+        raise GraphException("Nonexistent vertex!\n")
+
+    def __vertices_at(self, slots):
+        """
+        :return: list of the vertices stored in the given slots
+        """
+        if self.__identity:
+            return list(slots)
+        return [self.__read(self.__vertices, slot, slot + 1)[0] for slot in slots]
+
+    def __adjacency(self, offsets, ends, costs, vertex):
+        """
+        :return: the slots of the neighbors of a vertex on one side and the costs of the matching edges
+        """
+        slot = self.__slot_of(vertex)
+        start, stop = self.__read(offsets, slot, slot + 2)
+        return self.__read(ends, start, stop), self.__read(costs, start, stop, self.__cost_type)
+
+    def is_vertex(self, vertex):
+        try:
+            self.__slot_of(vertex)
+            return True
+        except GraphException:
+            return False
+
+    def parse_dictionary_keys(self):
+        """
+        :return: a list containing all vertices
+        """
+        return self.__vertices_at(range(self.__no_of_vertices))
+
+    def get_out_degree(self, vertex):
+        slot = self.__slot_of(vertex)
+        start, stop = self.__read(self.__out_offsets, slot, slot + 2)
+        return stop - start
+
+    def get_in_degree(self, vertex):
+        slot = self.__slot_of(vertex)
+        start, stop = self.__read(self.__in_offsets, slot, slot + 2)
+        return stop - start
+
+    def parse_outbound_neighbors(self, vertex):
+        """
+        :return: list of the outbound neighbors of the given vertex
+        :raises GraphException if vertex is invalid
+        """
+        targets, costs = self.__adjacency(self.__out_offsets, self.__out_targets, self.__out_costs, vertex)
+        return self.__vertices_at(targets)
+
+    def parse_inbound_neighbors(self, vertex):
+        """
+        :return: list of the inbound neighbors of the given vertex
+        :raises GraphException if vertex is invalid
+        """
+        sources, costs = self.__adjacency(self.__in_offsets, self.__in_sources, self.__in_costs, vertex)
+        return self.__vertices_at(sources)
+
+    def iterate_outbound_edges(self, vertex):
+        """
+        :return: list of (end_vertex, cost) tuples of the outbound edges of the given vertex
+        :raises GraphException if vertex is invalid
+        """
+        targets, costs = self.__adjacency(self.__out_offsets, self.__out_targets, self.__out_costs, vertex)
+        return list(zip(self.__vertices_at(targets), costs))
+
+    def is_edge(self, start_vertex, end_vertex):
+        return self.get_cost_of_edge(start_vertex, end_vertex) is not None
+
+    def get_cost_of_edge(self, start_vertex, end_vertex):
+        """
+        :return: the cost of the edge from start_vertex to end_vertex, None if there is no such edge
+        :raises GraphException if a vertex is invalid
+        """
+        end_slot = self.__slot_of(end_vertex)
+        targets, costs = self.__adjacency(self.__out_offsets, self.__out_targets, self.__out_costs, start_vertex)
+        for position, target in enumerate(targets):
+            if target == end_slot:
+                return costs[position]
+        return None
+
+    def backwards_Dijkstra(self, start_vertex, end_vertex=None):
+        """
+        Finds a lowest cost walk between the given vertices, using a "backwards" Dijkstra algorithm that reads the
+        inbound edges of every settled vertex from disk; only the reached vertices are kept in memory
+        The search stops as soon as start_vertex is settled; if start_vertex is None, the whole tree of lowest cost
+        walks ending in end_vertex is computed
+        :param start_vertex: starting vertex of path
+        :param end_vertex: ending vertex of path
+        :return: the distance to end_vertex of every reached vertex and the successor of every vertex on its walk
+        :raises GraphException if a vertex is invalid
+        """
+        end_slot = self.__slot_of(end_vertex)
+        start_slot = -1 if start_vertex is None else self.__slot_of(start_vertex)
+        dist = {end_slot: 0}
+        next = {}
+        settled = set()
+        heap = [(0, end_slot)]
+        while heap:
+            distance, slot = heappop(heap)
+            if slot in settled:
+                continue
+            settled.add(slot)
+            if slot == start_slot:
+                break
+            begin, stop = self.__read(self.__in_offsets, slot, slot + 2)
+            sources = self.__read(self.__in_sources, begin, stop)
+            costs = self.__read(self.__in_costs, begin, stop, self.__cost_type)
+            for position, neighbor in enumerate(sources):
+                new_distance = distance + costs[position]
+                if neighbor not in settled and new_distance < dist.get(neighbor, inf):
+                    dist[neighbor] = new_distance
+                    next[neighbor] = slot
+                    heappush(heap, (new_distance, neighbor))
+
+        if self.__identity:
+            return dist, next
+        slots = list(dist)
+        vertices = dict(zip(slots, self.__vertices_at(slots)))
+        return {vertices[slot]: distance for slot, distance in dist.items()}, \
+            {vertices[slot]: vertices[successor] for slot, successor in next.items()}
+
+    def get_lowest_cost_path(self, start_vertex, end_vertex):
+        """
+        Finds the lowest cost path between 2 vertices
+        :return: the path and its cost
+        :raises GraphException if there is no walk between the vertices or a vertex is invalid
+        """
+        dist, next = self.backwards_Dijkstra(start_vertex, end_vertex)
+        if start_vertex not in dist:
+            raise GraphException("No walk!")
+        path = [start_vertex]
+        while path[-1] != end_vertex:
+            path.append(next[path[-1]])
+        return path, dist[start_vertex]
+
+
+if __name__ == "__main__":
+    # usage: python diskGraph.py <input.txt> <output.bin>
+    if len(sys.argv) != 3:
+        print("Usage: python diskGraph.py <input text file> <output disk graph file>")
+        sys.exit(1)
+    convert_text_to_disk_graph(sys.argv[1], sys.argv[2])
+    print("Graph converted successfully!")
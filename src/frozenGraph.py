@@ -0,0 +1,465 @@
+from exceptions import *
+from denseIndex import DenseValues
+from array import array
+from bisect import bisect_left
+from collections import deque
+from heapq import heappush, heappop
+from math import inf
+
+
+class FrozenDirectedGraph:
+    """
+    Immutable, array-backed (CSR - compressed sparse row) snapshot of a directed graph.
+    Vertices are kept sorted in a vertex array and referred to internally by their position (slot) in it.
+    The outbound neighbors of the vertex in slot i are out_targets[out_offsets[i]:out_offsets[i + 1]], with the
+    matching costs at the same positions in out_costs; the inbound side is stored the same way.
+    """
+    def __init__(self, vertices, out_offsets, out_targets, out_costs, in_offsets, in_sources, in_costs):
+        self.__vertices = vertices
+        self.__out_offsets = out_offsets
+        self.__out_targets = out_targets
+        self.__out_costs = out_costs
+        self.__in_offsets = in_offsets
+        self.__in_sources = in_sources
+        self.__in_costs = in_costs
+        self.__no_of_vertices = len(vertices)
+        # when the vertices are exactly 0..n-1, a vertex is its own slot and no lookup is needed
+        self.__identity = self.__no_of_vertices == 0 or \
+            (vertices[0] == 0 and vertices[self.__no_of_vertices - 1] == self.__no_of_vertices - 1)
+
+    @property
+    def get_no_of_vertices(self):
+        """
+        :return: number of vertices of the graph
+        """
+        return self.__no_of_vertices
+
+    @property
+    def get_no_of_edges(self):
+        """
+        :return: number of edges of the graph
+        """
+        return len(self.__out_targets)
+
+    @property
+    def get_vertices(self):
+        """
+        :return: sorted array of the vertices of the graph
+        """
+        return self.__vertices
+
+    @property
+    def get_out_offsets(self):
+        """
+        :return: offsets of the outbound adjacency of every slot, of length n + 1
+        """
+        return self.__out_offsets
+
+    @property
+    def get_out_targets(self):
+        """
+        :return: slots of the outbound neighbors, grouped by source slot
+        """
+        return self.__out_targets
+
+    @property
+    def get_out_costs(self):
+        """
+        :return: costs of the outbound edges, parallel to the outbound targets
+        """
+        return self.__out_costs
+
+    @property
+    def get_in_offsets(self):
+        """
+        :return: offsets of the inbound adjacency of every slot, of length n + 1
+        """
+        return self.__in_offsets
+
+    @property
+    def get_in_sources(self):
+        """
+        :return: slots of the inbound neighbors, grouped by end slot
+        """
+        return self.__in_sources
+
+    @property
+    def get_in_costs(self):
+        """
+        :return: costs of the inbound edges, parallel to the inbound sources
+        """
+        return self.__in_costs
+
+    @property
+    def get_cost_type(self):
+        """
+        :return: typecode of the costs, "q" for integer costs, "d" for floating point ones
+        """
+        costs = self.__out_costs
+        return costs.typecode if isinstance(costs, array) else costs.format
+
+    @property
+    def get_arrays(self):
+        """
+        :return: tuple (vertices, out_offsets, out_targets, out_costs, in_offsets, in_sources, in_costs) of the arrays
+        of the graph, in the order they are laid out in a buffer (see from_buffer)
+        """
+        return self.__vertices, self.__out_offsets, self.__out_targets, self.__out_costs, \
+            self.__in_offsets, self.__in_sources, self.__in_costs
+
+    @staticmethod
+    def buffer_size(number_of_vertices, number_of_edges):
+        """
+        :return: number of bytes taken by the arrays of a graph laid out in a buffer, 8 bytes per item
+        """
+        return 8 * (3 * number_of_vertices + 2 + 4 * number_of_edges)
+
+    @staticmethod
+    def from_buffer(buffer, number_of_vertices, number_of_edges, cost_type):
+        """
+        Builds a graph whose arrays are views of a buffer, without copying them
+        :param buffer: memoryview of bytes holding the arrays of get_arrays one after another, 8 bytes per item
+        :param cost_type: typecode of the costs, "q" or "d"
+        :return: FrozenDirectedGraph backed by the buffer
+        """
+        lengths = (number_of_vertices, number_of_vertices + 1, number_of_edges, number_of_edges,
+                   number_of_vertices + 1, number_of_edges, number_of_edges)
+        types = ("q", "q", "q", cost_type, "q", "q", cost_type)
+        arrays = []
+        offset = 0
+        for length, typecode in zip(lengths, types):
+            arrays.append(buffer[offset:offset + 8 * length].cast(typecode))
+            offset += 8 * length
+
+        return FrozenDirectedGraph(*arrays)
+
+    def index_of(self, vertex):
+        """
+        :param vertex: vertex of the graph
+        :return: the slot of the given vertex
+        :raises GraphException if vertex is invalid
+        """
+        if self.__identity:
+            if isinstance(vertex, int) and 0 <= vertex < self.__no_of_vertices:
+                return vertex
+        else:
+            slot = bisect_left(self.__vertices, vertex)
+            if slot < self.__no_of_vertices and self.__vertices[slot] == vertex:
+                return slot
+        raise GraphException("Nonexistent vertex!\n")
+
+    def vertex_at(self, slot):
+        """
+        :param slot: slot of a vertex
+        :return: the vertex stored in the given slot
+        """
+        return self.__vertices[slot]
+
+    def parse_dictionary_keys(self):
+        """
+        :return: a list containing all vertices
+        """
+        return list(self.__vertices)
+
+    def get_out_degree(self, vertex):
+        """
+        Gets the out degree of given vertex
+        :return: integer representing the out degree
+        :raises GraphException if vertex is invalid
+        """
+        slot = self.index_of(vertex)
+        return self.__out_offsets[slot + 1] - self.__out_offsets[slot]
+
+    def get_in_degree(self, vertex):
+        """
+        Gets the in degree of given vertex
+        :return: integer representing the in degree
+        :raises GraphException if vertex is invalid
+        """
+        slot = self.index_of(vertex)
+        return self.__in_offsets[slot + 1] - self.__in_offsets[slot]
+
+    def parse_outbound_neighbors(self, vertex):
+        """
+        :param vertex: vertex whose neighbors are searched
+        :return: a list of all outbound neighbors of given vertex
+        :raises GraphException if vertex is invalid
+        """
+        slot = self.index_of(vertex)
+        vertices = self.__vertices
+        return [vertices[target] for target in self.__out_targets[self.__out_offsets[slot]:self.__out_offsets[slot + 1]]]
+
+    def parse_inbound_neighbors(self, vertex):
+        """
+        :param vertex: vertex whose neighbors are searched
+        :return: a list of all inbound neighbors of given vertex
+        :raises GraphException if vertex is invalid
+        """
+        slot = self.index_of(vertex)
+        vertices = self.__vertices
+        return [vertices[source] for source in self.__in_sources[self.__in_offsets[slot]:self.__in_offsets[slot + 1]]]
+
+    def iterate_outbound_edges(self, vertex):
+        """
+        :param vertex: vertex whose outbound edges are searched
+        :return: a list of (end_vertex, cost) tuples for all outbound edges of given vertex
+        :raises GraphException if vertex is invalid
+        """
+        slot = self.index_of(vertex)
+        vertices = self.__vertices
+        targets = self.__out_targets
+        costs = self.__out_costs
+        return [(vertices[targets[position]], costs[position])
+                for position in range(self.__out_offsets[slot], self.__out_offsets[slot + 1])]
+
+    def __find_edge(self, start_vertex, end_vertex):
+        """
+        :return: position of the edge (start_vertex, end_vertex) in the outbound arrays, -1 if there is no such edge
+        """
+        start_slot = self.index_of(start_vertex)
+        end_slot = self.index_of(end_vertex)
+        targets = self.__out_targets
+        for position in range(self.__out_offsets[start_slot], self.__out_offsets[start_slot + 1]):
+            if targets[position] == end_slot:
+                return position
+        return -1
+
+    def is_edge(self, start_vertex, end_vertex):
+        """
+        Checks if there is an edge between the 2 given vertices
+        :return: true if there is an edge from start_vertex to end_vertex, false otherwise
+        :raises GraphException if vertices are invalid
+        """
+        return self.__find_edge(start_vertex, end_vertex) != -1
+
+    def get_cost_of_edge(self, start_vertex, end_vertex):
+        """
+        :return: cost of given edge if it exists
+        """
+        position = self.__find_edge(start_vertex, end_vertex)
+        if position != -1:
+            return self.__out_costs[position]
+
+    def iterable_edges(self):
+        """
+        :return: returns the edges of a graph in iterable form
+        """
+        vertices = self.__vertices
+        offsets = self.__out_offsets
+        targets = self.__out_targets
+        edges = []
+        for slot in range(self.__no_of_vertices):
+            for position in range(offsets[slot], offsets[slot + 1]):
+                edges.append((vertices[slot], vertices[targets[position]]))
+
+        return edges
+
+    def iterable_costs(self):
+        """
+        :return: returns the costs of a graph in iterable form, in the same order as iterable_edges
+        """
+        return list(self.__out_costs)
+
+    def backwards_Dijkstra(self, start_vertex, end_vertex=None):
+        """
+        Finds a lowest cost walk between the given vertices, using a "backwards" Dijkstra algorithm
+        The search stops as soon as start_vertex is settled; if start_vertex is None, the whole tree of lowest cost
+        walks ending in end_vertex is computed
+        :param start_vertex: starting vertex of path
+        :param end_vertex: ending vertex of path
+        :return: the distance of every vertex to end_vertex and the successor of every vertex on its walk
+        """
+        end_slot = self.index_of(end_vertex)
+        start_slot = -1 if start_vertex is None else self.index_of(start_vertex)
+        offsets = self.__in_offsets
+        sources = self.__in_sources
+        costs = self.__in_costs
+        dist = [100000000001] * self.__no_of_vertices
+        next = [-1] * self.__no_of_vertices
+        dist[end_slot] = 0
+        heap = [(0, end_slot)]
+        while heap:
+            distance, slot = heappop(heap)
+            # stale entry, the vertex was already settled with a lower distance
+            if distance > dist[slot]:
+                continue
+            if slot == start_slot:
+                break
+            for position in range(offsets[slot], offsets[slot + 1]):
+                neighbor = sources[position]
+                new_distance = distance + costs[position]
+                if new_distance < dist[neighbor]:
+                    dist[neighbor] = new_distance
+                    next[neighbor] = slot
+                    heappush(heap, (new_distance, neighbor))
+
+        return self.__to_vertex_dict(dist), self.__to_vertex_dict(next, lambda slot: slot != -1)
+
+    def topological_sort(self, method="dfs"):
+        """
+        Performs a topological sorting of the vertices
+        :param method: "dfs" for an iterative depth-first traversal over the inbound edges, "kahn" for Kahn's algorithm
+        :return: tuple (true, sorted vertices) if the graph is a DAG, (false, vertices of a cycle) otherwise;
+        the cycle is given in the direction of its edges and ends with its first vertex
+        :raises GraphException if the method is unknown
+        """
+        if method == "kahn":
+            return self.__topological_sort_Kahn()
+        if method != "dfs":
+            raise GraphException("Unknown topological sort method!\n")
+
+        offsets = self.__in_offsets
+        sources = self.__in_sources
+        vertices = self.__vertices
+        # 0 - not visited, 1 - in process, 2 - fully processed
+        state = bytearray(self.__no_of_vertices)
+        sorted = []
+        for root in range(self.__no_of_vertices):
+            if state[root]:
+                continue
+            state[root] = 1
+            stack = [(root, offsets[root])]
+            while stack:
+                slot, position = stack[-1]
+                if position < offsets[slot + 1]:
+                    stack[-1] = (slot, position + 1)
+                    neighbor = sources[position]
+                    if state[neighbor] == 1:
+                        # the path on the stack goes backwards along the edges, from neighbor to slot
+                        path = [entry[0] for entry in stack]
+                        cycle = [vertices[entry] for entry in reversed(path[path.index(neighbor):])]
+                        return False, cycle + [vertices[slot]]
+                    if state[neighbor] == 0:
+                        state[neighbor] = 1
+                        stack.append((neighbor, offsets[neighbor]))
+                else:
+                    stack.pop()
+                    state[slot] = 2
+                    sorted.append(vertices[slot])
+
+        return True, sorted
+
+    def __topological_sort_Kahn(self):
+        """
+        Kahn's algorithm: repeatedly removes the vertices that have no remaining inbound edges
+        :return: same as topological_sort
+        """
+        out_offsets = self.__out_offsets
+        targets = self.__out_targets
+        in_offsets = self.__in_offsets
+        vertices = self.__vertices
+        in_degree = [in_offsets[slot + 1] - in_offsets[slot] for slot in range(self.__no_of_vertices)]
+        ready = deque(slot for slot in range(self.__no_of_vertices) if in_degree[slot] == 0)
+        sorted = []
+        while ready:
+            slot = ready.popleft()
+            sorted.append(vertices[slot])
+            for position in range(out_offsets[slot], out_offsets[slot + 1]):
+                neighbor = targets[position]
+                in_degree[neighbor] -= 1
+                if in_degree[neighbor] == 0:
+                    ready.append(neighbor)
+
+        if len(sorted) == self.__no_of_vertices:
+            return True, sorted
+        # every vertex left has an inbound neighbor which is also left, so walking backwards closes a cycle
+        sources = self.__in_sources
+        slot = next(slot for slot in range(self.__no_of_vertices) if in_degree[slot] > 0)
+        position_in_path = {}
+        path = []
+        while slot not in position_in_path:
+            position_in_path[slot] = len(path)
+            path.append(slot)
+            slot = next(sources[position] for position in range(in_offsets[slot], in_offsets[slot + 1])
+                        if in_degree[sources[position]] > 0)
+        cycle = [vertices[entry] for entry in reversed(path[position_in_path[slot]:])]
+        return False, cycle + [cycle[0]]
+
+    def DAG(self, method="dfs"):
+        """
+        Verifies if the corresponding graph is a DAG (Directed Acyclic Graph)
+        :param method: "dfs" for the depth-first traversal algorithm, "kahn" for Kahn's algorithm
+        :return: the topologically sorted vertices if the graph is a DAG, an empty list otherwise
+        """
+        is_dag, sorted = self.topological_sort(method)
+        if not is_dag:
+            return []
+        return sorted
+
+    def highest_cost_path(self, sorted, start_vertex, end_vertex):
+        """
+        Finds a highest cost path between two given vertices
+        :param sorted: list of sorted vertices
+        :param start_vertex: starting vertex
+        :param end_vertex: ending vertex
+        :return: the cost of the path and a read-only mapping with the predecessor of every vertex on it (-1 for the
+        unreached vertices), as DirectedGraph.highest_cost_path
+        """
+        offsets = self.__out_offsets
+        targets = self.__out_targets
+        costs = self.__out_costs
+        distances = [-inf] * self.__no_of_vertices
+        prev = [-1] * self.__no_of_vertices
+        end_slot = self.index_of(end_vertex)
+        distances[self.index_of(start_vertex)] = 0
+        for vertex in sorted:
+            slot = self.index_of(vertex)
+            if slot == end_slot:
+                break
+            if distances[slot] == -inf:
+                continue
+            for position in range(offsets[slot], offsets[slot + 1]):
+                neighbor = targets[position]
+                if distances[neighbor] < distances[slot] + costs[position]:
+                    distances[neighbor] = distances[slot] + costs[position]
+                    prev[neighbor] = slot
+
+        if self.__identity:
+            return distances[end_slot], DenseValues(None, prev)
+        vertices = self.__vertices
+        return distances[end_slot], DenseValues({vertex: slot for slot, vertex in enumerate(vertices)},
+                                                [-1 if slot == -1 else vertices[slot] for slot in prev])
+
+    def bellman_ford(self, start_vertex, max_length):
+        """
+        Bellman Ford algorithm used to find the shortest path from the source vertex to every vertex in a weighted graph
+        :param start_vertex: starting vertex
+        :param max_length: maximum length of the path
+        :return: all the possible distances with length < max_length
+        """
+        offsets = self.__out_offsets
+        targets = self.__out_targets
+        costs = self.__out_costs
+        initial_dict = {self.index_of(start_vertex): 0}
+        layers = [initial_dict]
+        for k in range(1, max_length + 1):
+            previous_dict = layers[k - 1]
+            current_dict = {}
+            for slot, distance in previous_dict.items():
+                for position in range(offsets[slot], offsets[slot + 1]):
+                    neighbor = targets[position]
+                    if neighbor not in current_dict or current_dict[neighbor] > distance + costs[position]:
+                        current_dict[neighbor] = distance + costs[position]
+            layers.append(current_dict)
+
+        if self.__identity:
+            return layers
+        vertices = self.__vertices
+        return [{vertices[slot]: distance for slot, distance in layer.items()} for layer in layers]
+
+    def __to_vertex_dict(self, values, keep=None, default=None):
+        """
+        Converts a list indexed by slot, whose values are also slots when keep is given, to a dictionary keyed by vertex
+        :param values: list indexed by slot
+        :param keep: predicate selecting the slot values to be translated to vertices, the rest are replaced by default
+        """
+        vertices = self.__vertices
+        if keep is None:
+            return {vertices[slot]: value for slot, value in enumerate(values)}
+        result = {}
+        for slot, value in enumerate(values):
+            if keep(value):
+                result[vertices[slot]] = vertices[value]
+            elif default is not None:
+                result[vertices[slot]] = default
+        return result
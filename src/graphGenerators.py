@@ -0,0 +1,192 @@
+from directedGraph import *
+from math import isqrt, log, floor
+import random
+
+# number of edges handed to the bulk insertion path at once
+BATCH_SIZE = 1 << 16
+# default range of the random edge costs
+MIN_COST = 0
+MAX_COST = 200
+
+
+def edge_batches(pairs, rng, min_cost=MIN_COST, max_cost=MAX_COST):
+    """
+    Groups a stream of (start_vertex, end_vertex) pairs into batches of edges with random costs
+    :param pairs: iterable of (start_vertex, end_vertex) tuples
+    :param rng: random.Random instance the costs are drawn from
+    :return: generator yielding lists of (start_vertex, end_vertex, cost) tuples
+    """
+    cost_range = range(min_cost, max_cost + 1)
+    batch = []
+    for pair in pairs:
+        batch.append(pair)
+        if len(batch) == BATCH_SIZE:
+            yield [(start_vertex, end_vertex, cost) for (start_vertex, end_vertex), cost
+                   in zip(batch, rng.choices(cost_range, k=len(batch)))]
+            batch = []
+    if batch:
+        yield [(start_vertex, end_vertex, cost) for (start_vertex, end_vertex), cost
+               in zip(batch, rng.choices(cost_range, k=len(batch)))]
+
+
+def distinct_indices(population_size, count, rng):
+    """
+    Samples distinct integers from range(population_size) without replacement; when more than half of the range is
+    needed, the excluded integers are sampled instead
+    :return: iterable of count distinct integers
+    """
+    if 2 * count <= population_size:
+        return rng.sample(range(population_size), count)
+    excluded = set(rng.sample(range(population_size), population_size - count))
+    return (index for index in range(population_size) if index not in excluded)
+
+
+def build_graph(number_of_vertices, batches):
+    """
+    :param batches: iterable of lists of (start_vertex, end_vertex, cost) tuples with distinct edges
+    :return: DirectedGraph with the vertices 0..number_of_vertices - 1 and the given edges
+    """
+    graph = DirectedGraph(number_of_vertices)
+    for batch in batches:
+        graph.add_edges_from(batch)
+
+    return graph
+
+
+def gnm_edges(number_of_vertices, number_of_edges, rng, loops=True):
+    """
+    Erdos-Renyi G(n, m) model: number_of_edges distinct edges chosen uniformly at random
+    :param loops: if true, edges from a vertex to itself can be chosen
+    :return: iterable of (start_vertex, end_vertex) tuples
+    :raises GraphException if there are more edges than possible
+    """
+    population_size = number_of_vertices * number_of_vertices if loops else \
+        number_of_vertices * (number_of_vertices - 1)
+    if number_of_edges < 0 or number_of_edges > population_size:
+        raise GraphException("Too many edges!\n")
+
+    indices = distinct_indices(population_size, number_of_edges, rng)
+    if loops:
+        return (divmod(index, number_of_vertices) for index in indices)
+    # without loops, row u has n - 1 columns: the column v >= u stands for v + 1
+    return ((start_vertex, end_vertex + (end_vertex >= start_vertex)) for start_vertex, end_vertex
+            in (divmod(index, number_of_vertices - 1) for index in indices))
+
+
+def gnp_edges(number_of_vertices, probability, rng, loops=True):
+    """
+    Erdos-Renyi G(n, p) model: every possible edge is chosen independently with the given probability.
+    Instead of a coin flip per possible edge, the gap to the next chosen edge is drawn from the geometric distribution
+    (Batagelj and Brandes), so the time is proportional to the number of chosen edges.
+    :param loops: if true, edges from a vertex to itself can be chosen
+    :return: generator yielding (start_vertex, end_vertex) tuples
+    :raises GraphException if the probability is not between 0 and 1
+    """
+    if not 0 <= probability <= 1:
+        raise GraphException("Probability must be between 0 and 1!\n")
+    if probability == 0:
+        return
+    columns = number_of_vertices if loops else number_of_vertices - 1
+    population_size = number_of_vertices * columns
+    log_complement = log(1 - probability) if probability < 1 else None
+    index = -1
+    while True:
+        if log_complement is None:
+            index += 1
+        else:
+            index += 1 + floor(log(1 - rng.random()) / log_complement)
+        if index >= population_size:
+            return
+        start_vertex, end_vertex = divmod(index, columns)
+        yield start_vertex, end_vertex + (not loops and end_vertex >= start_vertex)
+
+
+def preferential_attachment_edges(number_of_vertices, edges_per_vertex, rng):
+    """
+    Barabasi-Albert model: the vertices arrive one by one and every new vertex gets edges to edges_per_vertex distinct
+    older vertices, chosen with probability proportional to their degree, which gives a power-law degree distribution.
+    The first edges_per_vertex vertices are the initial ones; every edge goes from the newer vertex to the older one.
+    :return: generator yielding (start_vertex, end_vertex) tuples
+    :raises GraphException if edges_per_vertex is invalid
+    """
+    if edges_per_vertex < 1 or edges_per_vertex >= max(number_of_vertices, 2):
+        raise GraphException("Invalid number of edges per vertex!\n")
+
+    # every vertex appears in endpoints once per edge it has, so a uniform pick from it is proportional to degree
+    endpoints = []
+    for new_vertex in range(edges_per_vertex, number_of_vertices):
+        if not endpoints:
+            targets = range(edges_per_vertex)
+        else:
+            targets = {}
+            while len(targets) < edges_per_vertex:
+                targets[endpoints[int(rng.random() * len(endpoints))]] = None
+        for end_vertex in targets:
+            endpoints.append(new_vertex)
+            endpoints.append(end_vertex)
+            yield new_vertex, end_vertex
+
+
+def random_dag_edges(number_of_vertices, number_of_edges, rng, shuffle=True):
+    """
+    Random directed acyclic graph: number_of_edges distinct edges chosen uniformly among the pairs (i, j), i < j,
+    of a topological order of the vertices
+    :param shuffle: if true, the topological order is a random permutation of the vertices, otherwise 0, 1, ..., n - 1
+    :return: iterable of (start_vertex, end_vertex) tuples
+    :raises GraphException if there are more edges than possible
+    """
+    population_size = number_of_vertices * (number_of_vertices - 1) // 2
+    if number_of_edges < 0 or number_of_edges > population_size:
+        raise GraphException("Too many edges!\n")
+
+    order = list(range(number_of_vertices))
+    if shuffle:
+        rng.shuffle(order)
+
+    def decode(index):
+        # the pairs are numbered column by column: (0, 1), (0, 2), (1, 2), (0, 3), ...
+        end = (1 + isqrt(1 + 8 * index)) // 2
+        return order[index - end * (end - 1) // 2], order[end]
+
+    return map(decode, distinct_indices(population_size, number_of_edges, rng))
+
+
+def gnm_graph(number_of_vertices, number_of_edges, seed=None, loops=True, min_cost=MIN_COST, max_cost=MAX_COST):
+    """
+    :return: random DirectedGraph in the G(n, m) model, the same for the same seed
+    :raises GraphException if there are more edges than possible
+    """
+    rng = random.Random(seed)
+    pairs = gnm_edges(number_of_vertices, number_of_edges, rng, loops)
+    return build_graph(number_of_vertices, edge_batches(pairs, rng, min_cost, max_cost))
+
+
+def gnp_graph(number_of_vertices, probability, seed=None, loops=True, min_cost=MIN_COST, max_cost=MAX_COST):
+    """
+    :return: random DirectedGraph in the G(n, p) model, the same for the same seed
+    :raises GraphException if the probability is not between 0 and 1
+    """
+    rng = random.Random(seed)
+    pairs = gnp_edges(number_of_vertices, probability, rng, loops)
+    return build_graph(number_of_vertices, edge_batches(pairs, rng, min_cost, max_cost))
+
+
+def preferential_attachment_graph(number_of_vertices, edges_per_vertex, seed=None, min_cost=MIN_COST,
+                                  max_cost=MAX_COST):
+    """
+    :return: random DirectedGraph in the preferential attachment model, the same for the same seed
+    :raises GraphException if edges_per_vertex is invalid
+    """
+    rng = random.Random(seed)
+    pairs = preferential_attachment_edges(number_of_vertices, edges_per_vertex, rng)
+    return build_graph(number_of_vertices, edge_batches(pairs, rng, min_cost, max_cost))
+
+
+def random_dag(number_of_vertices, number_of_edges, seed=None, shuffle=True, min_cost=MIN_COST, max_cost=MAX_COST):
+    """
+    :return: random directed acyclic DirectedGraph, the same for the same seed
+    :raises GraphException if there are more edges than possible
+    """
+    rng = random.Random(seed)
+    pairs = random_dag_edges(number_of_vertices, number_of_edges, rng, shuffle)
+    return build_graph(number_of_vertices, edge_batches(pairs, rng, min_cost, max_cost))
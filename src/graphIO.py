@@ -0,0 +1,259 @@
+from directedGraph import *
+from frozenGraph import FrozenDirectedGraph
+import gzip
+import lzma
+import mmap
+import struct
+import sys
+
+# number of bytes read from the input file at once
+CHUNK_SIZE = 1 << 20
+# number of lines buffered by the writer before they are written to the output file
+WRITE_BLOCK_LINES = 1 << 16
+
+# binary format: header, then the arrays of the CSR snapshot, each stored as 8 byte native-endian items:
+# vertices (n), out_offsets (n + 1), out_targets (m), out_costs (m), in_offsets (n + 1), in_sources (m), in_costs (m)
+BINARY_MAGIC = b"GRAPHCSR"
+BINARY_VERSION = 1
+# magic, version, byte order (b"l" or b"b"), cost typecode (b"q" or b"d"), number of vertices, number of edges
+BINARY_HEADER = struct.Struct("=8sIcc2xqq")
+
+
+def open_graph_file(file_name, mode, compression=None):
+    """
+    Opens a graph file in binary mode, transparently compressing or decompressing it
+    :param file_name: name of the file
+    :param mode: "rb" or "wb"
+    :param compression: None, "gzip" or "xz"; if not given, it is deduced from the ".gz"/".xz" extension
+    :return: file object
+    :raises GraphException if the compression is not supported
+    """
+    if compression is None:
+        if file_name.endswith(".gz"):
+            compression = "gzip"
+        elif file_name.endswith(".xz"):
+            compression = "xz"
+    if compression is None:
+        return open(file_name, mode)
+    if compression == "gzip":
+        # the lowest compression level keeps the writer close to disk speed
+        return gzip.open(file_name, mode, compresslevel=1) if "w" in mode else gzip.open(file_name, mode)
+    if compression == "xz":
+        return lzma.open(file_name, mode)
+    raise GraphException("Unsupported compression!\n")
+
+
+def parse_edge_lines(lines):
+    """
+    Parses a block of complete lines of the text format
+    :param lines: bytes containing whole lines "start_vertex end_vertex cost" or "vertex" (isolated vertex)
+    :return: list of (start_vertex, end_vertex, cost) tuples and list of isolated vertices
+    :raises GraphException if a line is malformed
+    """
+    try:
+        # fast path: every line of the block is an edge; unpacking fails on any line without exactly 3 tokens
+        # (blank lines and isolated vertices included), which leaves the block to the line by line parser
+        return [(int(start_vertex), int(end_vertex), int(cost))
+                for start_vertex, end_vertex, cost in map(bytes.split, lines.splitlines())], []
+    except ValueError:
+        pass
+
+    try:
+        edges = []
+        isolated = []
+        for line in lines.splitlines():
+            line = line.split()
+            if len(line) == 3:
+                edges.append((int(line[0]), int(line[1]), int(line[2])))
+            elif len(line) == 1:
+                isolated.append(int(line[0]))
+            elif len(line) != 0:
+                raise GraphException("Invalid line in input file!\n")
+        return edges, isolated
+    except ValueError:
+        raise GraphException("Invalid line in input file!\n")
+
+
+def iterate_text_graph(file_name, chunk_size=CHUNK_SIZE):
+    """
+    Streams a graph file in the "n m" / "start_vertex end_vertex cost" text format, one block of lines at a time
+    :param file_name: name of the input file
+    :param chunk_size: number of bytes read at once
+    :return: generator yielding first (number_of_vertices, number_of_edges), then (edges, isolated_vertices) blocks
+    :raises GraphException if the file can't be read or is malformed
+    """
+    try:
+        with open_graph_file(file_name, "rb") as f:
+            first = f.readline().split()
+            if len(first) != 2:
+                raise GraphException("Invalid first line in input file!\n")
+            yield int(first[0]), int(first[1])
+
+            leftover = b""
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                # only whole lines are parsed, the incomplete last one is kept for the next chunk
+                end = chunk.rfind(b"\n")
+                if end == -1:
+                    leftover += chunk
+                    continue
+                block = leftover + chunk[:end + 1]
+                leftover = chunk[end + 1:]
+                yield parse_edge_lines(block)
+
+            if leftover.strip():
+                yield parse_edge_lines(leftover)
+    except (IOError, ValueError, EOFError, lzma.LZMAError):
+        raise GraphException("Error reading input file!\n")
+
+
+def load_text_graph(file_name, chunk_size=CHUNK_SIZE):
+    """
+    Loads a directed graph from a text file, adding the edges of every block through the bulk insertion path
+    :param file_name: name of the input file
+    :param chunk_size: number of bytes read at once
+    :return: the loaded DirectedGraph
+    :raises GraphException if the file can't be read or is malformed
+    """
+    blocks = iterate_text_graph(file_name, chunk_size)
+    number_of_vertices, number_of_edges = next(blocks)
+    graph = DirectedGraph(number_of_vertices)
+    for edges, isolated in blocks:
+        for vertex in isolated:
+            if not graph.is_vertex(vertex):
+                graph.add_vertex(vertex)
+        graph.add_edges_from(edges)
+
+    return graph
+
+
+def write_text_graph(graph, file_name, compression=None):
+    """
+    Writes a graph to a file in the text format, in a single pass over the vertices: the outbound edges of every
+    vertex are written as "start_vertex end_vertex cost" lines and isolated vertices as "vertex" lines
+    :param graph: DirectedGraph or FrozenDirectedGraph
+    :param file_name: name of the output file
+    :param compression: None, "gzip" or "xz"; if not given, it is deduced from the ".gz"/".xz" extension
+    :raises GraphException if the file can't be written
+    """
+    try:
+        with open_graph_file(file_name, "wb", compression) as f:
+            f.write(("%d %d\n" % (graph.get_no_of_vertices, graph.get_no_of_edges)).encode())
+            lines = []
+            for vertex in graph.parse_dictionary_keys():
+                edges = graph.iterate_outbound_edges(vertex)
+                if edges:
+                    prefix = str(vertex) + " "
+                    lines.extend(prefix + str(end_vertex) + " " + str(cost) for end_vertex, cost in edges)
+                elif graph.get_in_degree(vertex) == 0:
+                    lines.append(str(vertex))
+                if len(lines) >= WRITE_BLOCK_LINES:
+                    lines.append("")
+                    f.write("\n".join(lines).encode())
+                    lines = []
+            if lines:
+                lines.append("")
+                f.write("\n".join(lines).encode())
+    except IOError:
+        raise GraphException("Error writing output file!\n")
+
+
+def save_binary_graph(graph, file_name):
+    """
+    Writes a graph to a file in the binary format
+    :param graph: DirectedGraph or FrozenDirectedGraph
+    :param file_name: name of the output file
+    :raises GraphException if the file can't be written
+    """
+    if not isinstance(graph, FrozenDirectedGraph):
+        graph = graph.freeze()
+    try:
+        with open(file_name, "wb") as f:
+            f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, sys.byteorder[0].encode(),
+                                       graph.get_cost_type.encode(), graph.get_no_of_vertices, graph.get_no_of_edges))
+            for values in graph.get_arrays:
+                f.write(memoryview(values).cast("B"))
+    except IOError:
+        raise GraphException("Error writing output file!\n")
+
+
+def is_binary_graph_file(file_name):
+    """
+    :return: true if the given file starts with the magic bytes of the binary format, false otherwise
+    """
+    try:
+        with open(file_name, "rb") as f:
+            return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    except IOError:
+        return False
+
+
+def load_binary_graph(file_name):
+    """
+    Opens a graph stored in the binary format; the file is memory-mapped, so the arrays are only read
+    from disk when they are accessed
+    :param file_name: name of the input file
+    :return: FrozenDirectedGraph backed by the mapped file
+    :raises GraphException if the file can't be read or is not in the binary format
+    """
+    try:
+        with open(file_name, "rb") as f:
+            buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (IOError, ValueError):
+        raise GraphException("Error reading input file!\n")
+
+    if len(buffer) < BINARY_HEADER.size:
+        raise GraphException("Invalid binary graph file!\n")
+    magic, version, byte_order, cost_type, number_of_vertices, number_of_edges = \
+        BINARY_HEADER.unpack_from(buffer)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise GraphException("Invalid binary graph file!\n")
+    if byte_order != sys.byteorder[0].encode():
+        raise GraphException("Binary graph file was written on a machine with a different byte order!\n")
+    if len(buffer) != BINARY_HEADER.size + FrozenDirectedGraph.buffer_size(number_of_vertices, number_of_edges):
+        raise GraphException("Invalid binary graph file!\n")
+
+    return FrozenDirectedGraph.from_buffer(buffer[BINARY_HEADER.size:], number_of_vertices, number_of_edges,
+                                           cost_type.decode())
+
+
+def convert_text_to_binary(text_file_name, binary_file_name):
+    """
+    Converts a graph file from the text format to the binary format
+    :param text_file_name: name of the input text file
+    :param binary_file_name: name of the output binary file
+    """
+    save_binary_graph(load_text_graph(text_file_name), binary_file_name)
+
+
+def graphs_equal(graph1, graph2):
+    """
+    :return: true if the 2 graphs have the same vertices and the same edges with the same costs, false otherwise
+    """
+    if sorted(graph1.parse_dictionary_keys()) != sorted(graph2.parse_dictionary_keys()):
+        return False
+    edges1 = dict(zip(graph1.iterable_edges(), graph1.iterable_costs()))
+    edges2 = dict(zip(graph2.iterable_edges(), graph2.iterable_costs()))
+    return edges1 == edges2
+
+
+def check_binary_round_trip(text_file_name, binary_file_name):
+    """
+    Checks that a binary file holds the same graph as the text file it was converted from
+    :return: true if the graph loaded from both files is the same, false otherwise
+    """
+    return graphs_equal(load_text_graph(text_file_name), load_binary_graph(binary_file_name))
+
+
+if __name__ == "__main__":
+    # usage: python graphIO.py <input.txt> <output.bin>
+    if len(sys.argv) != 3:
+        print("Usage: python graphIO.py <input text file> <output binary file>")
+        sys.exit(1)
+    convert_text_to_binary(sys.argv[1], sys.argv[2])
+    if not check_binary_round_trip(sys.argv[1], sys.argv[2]):
+        print("Round trip check failed!")
+        sys.exit(1)
+    print("Graph converted successfully!")
@@ -0,0 +1,134 @@
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+
+# number of algorithm runs kept by an Instrumentation
+RUN_HISTORY = 100
+
+
+class AlgorithmStats:
+    """
+    Counters of one algorithm run. The algorithms update the attributes directly, and only when instrumentation
+    is enabled, so a disabled instrumentation costs a single None check per counter update.
+    """
+    __slots__ = ("name", "relaxations", "heap_pushes", "heap_pops", "vertices_settled", "edges_scanned",
+                 "peak_frontier", "elapsed", "__start")
+
+    def __init__(self, name):
+        self.name = name
+        self.relaxations = 0
+        self.heap_pushes = 0
+        self.heap_pops = 0
+        self.vertices_settled = 0
+        self.edges_scanned = 0
+        self.peak_frontier = 0
+        self.elapsed = None
+        self.__start = perf_counter()
+
+    @property
+    def get_stale_pops(self):
+        """
+        :return: number of heap entries popped after their vertex was settled (left behind by duplicate pushes)
+        """
+        return max(self.heap_pops - self.vertices_settled, 0)
+
+    def frontier(self, size):
+        """
+        Records the current size of the frontier (heap or queue) of the algorithm
+        """
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def finish(self):
+        """
+        Records the wall-clock time of the run; called when the algorithm returns
+        """
+        self.elapsed = perf_counter() - self.__start
+
+    def as_dict(self):
+        """
+        :return: dictionary with all the counters of the run
+        """
+        return {
+            "name": self.name,
+            "relaxations": self.relaxations,
+            "heap_pushes": self.heap_pushes,
+            "heap_pops": self.heap_pops,
+            "stale_pops": self.get_stale_pops,
+            "vertices_settled": self.vertices_settled,
+            "edges_scanned": self.edges_scanned,
+            "peak_frontier": self.peak_frontier,
+            "elapsed": self.elapsed
+        }
+
+    def __str__(self):
+        elapsed = "unfinished" if self.elapsed is None else "%.6f s" % self.elapsed
+        return "%s: %s, %d vertices settled, %d edges scanned, %d relaxations, %d heap pushes, %d heap pops " \
+               "(%d stale), peak frontier %d" % (self.name, elapsed, self.vertices_settled, self.edges_scanned,
+                                                 self.relaxations, self.heap_pushes, self.heap_pops,
+                                                 self.get_stale_pops, self.peak_frontier)
+
+
+class Instrumentation:
+    """
+    Opt-in collector of the AlgorithmStats of the algorithm runs of a graph
+    """
+    def __init__(self):
+        self.__enabled = False
+        self.__runs = deque(maxlen=RUN_HISTORY)
+
+    @property
+    def get_enabled(self):
+        """
+        :return: true if the algorithm runs are recorded, false otherwise
+        """
+        return self.__enabled
+
+    @property
+    def get_runs(self):
+        """
+        :return: list with the stats of the recorded runs, oldest first
+        """
+        return list(self.__runs)
+
+    @property
+    def get_last(self):
+        """
+        :return: the stats of the last recorded run, None if there is none
+        """
+        return self.__runs[-1] if self.__runs else None
+
+    def enable(self):
+        self.__enabled = True
+
+    def disable(self):
+        self.__enabled = False
+
+    def clear(self):
+        self.__runs.clear()
+
+    def start(self, name):
+        """
+        Called by an algorithm when it starts
+        :param name: name of the algorithm
+        :return: new AlgorithmStats for the run if instrumentation is enabled, None otherwise
+        """
+        if not self.__enabled:
+            return None
+        stats = AlgorithmStats(name)
+        self.__runs.append(stats)
+        return stats
+
+    @contextmanager
+    def session(self):
+        """
+        Context manager recording the algorithm runs of its block, which replace the previously recorded ones
+        :return: the Instrumentation
+        """
+        enabled = self.__enabled
+        self.__runs.clear()
+        self.__enabled = True
+        try:
+            yield self
+        finally:
+            self.__enabled = enabled
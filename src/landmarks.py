@@ -0,0 +1,262 @@
+from exceptions import *
+from array import array
+from heapq import heappush, heappop
+from math import inf
+import struct
+import zlib
+
+# landmark index file: header, then the landmark slots (k items) and, for every landmark, the distances
+# from the landmark to every vertex (n items) followed by the distances from every vertex to the landmark (n items)
+LANDMARK_MAGIC = b"GRAPHALT"
+LANDMARK_VERSION = 2
+# magic, version, number of landmarks, number of vertices, fingerprint of the graph, number of landmarks requested
+LANDMARK_HEADER = struct.Struct("=8sIIqII")
+# number of landmark bounds evaluated during a query
+ACTIVE_BOUNDS = 4
+
+
+def graph_fingerprint(frozen_graph):
+    """
+    :param frozen_graph: FrozenDirectedGraph
+    :return: checksum of the vertices, edges and costs of the graph
+    """
+    checksum = 0
+    for values in (frozen_graph.get_vertices, frozen_graph.get_out_offsets, frozen_graph.get_out_targets,
+                   frozen_graph.get_out_costs):
+        checksum = zlib.crc32(memoryview(values).cast("B"), checksum)
+    return checksum
+
+
+def bound_at(minuend, subtrahend):
+    """
+    :return: minuend - subtrahend, 0 when both are infinite (the difference of two infinite distances bounds nothing)
+    """
+    if minuend == inf and subtrahend == inf:
+        return 0
+    return minuend - subtrahend
+
+
+def single_source_distances(offsets, neighbors, costs, source, number_of_vertices):
+    """
+    Dijkstra algorithm over one direction of a CSR graph
+    :return: array with the distance from source to every slot, inf for the unreachable ones
+    """
+    dist = array("d", [inf]) * number_of_vertices
+    dist[source] = 0
+    heap = [(0, source)]
+    while heap:
+        distance, slot = heappop(heap)
+        if distance > dist[slot]:
+            continue
+        for position in range(offsets[slot], offsets[slot + 1]):
+            neighbor = neighbors[position]
+            new_distance = distance + costs[position]
+            if new_distance < dist[neighbor]:
+                dist[neighbor] = new_distance
+                heappush(heap, (new_distance, neighbor))
+    return dist
+
+
+class LandmarkIndex:
+    """
+    ALT (A*, landmarks and triangle inequality) index of a graph with non-negative costs.
+    For every landmark L it stores d(L, v) and d(v, L) for all vertices v; by the triangle inequality
+    d(v, t) >= d(v, L) - d(t, L) and d(v, t) >= d(L, t) - d(L, v), which gives A* a lower bound of the remaining cost.
+    """
+    def __init__(self, landmarks, from_landmark, to_landmark, fingerprint, requested_landmarks):
+        self.__landmarks = landmarks
+        self.__from_landmark = from_landmark
+        self.__to_landmark = to_landmark
+        self.__fingerprint = fingerprint
+        self.__requested_landmarks = requested_landmarks
+
+    @property
+    def get_landmarks(self):
+        """
+        :return: slots of the landmarks
+        """
+        return self.__landmarks
+
+    @property
+    def get_fingerprint(self):
+        """
+        :return: fingerprint of the graph the index was built on
+        """
+        return self.__fingerprint
+
+    @property
+    def get_requested_landmarks(self):
+        """
+        :return: number of landmarks asked for when the index was built, which can be more than it has
+        """
+        return self.__requested_landmarks
+
+    @staticmethod
+    def build(frozen_graph, number_of_landmarks=8):
+        """
+        Selects the landmarks with the farthest-first heuristic and computes their distance arrays
+        :param frozen_graph: FrozenDirectedGraph with non-negative costs
+        :param number_of_landmarks: number of landmarks to select
+        :return: LandmarkIndex of the graph
+        :raises GraphException if the graph has negative costs
+        """
+        if any(cost < 0 for cost in frozen_graph.get_out_costs):
+            raise GraphException("Landmarks need a graph with non-negative costs!\n")
+        number_of_vertices = frozen_graph.get_no_of_vertices
+        out_offsets = frozen_graph.get_out_offsets
+        in_offsets = frozen_graph.get_in_offsets
+
+        def degree(slot):
+            return out_offsets[slot + 1] - out_offsets[slot] + in_offsets[slot + 1] - in_offsets[slot]
+
+        landmarks = array("q")
+        from_landmark = []
+        to_landmark = []
+        # distance from the closest landmark selected so far, for every vertex
+        closest = array("d", [inf]) * number_of_vertices
+        # the first landmark is the vertex with the most edges, which is very likely in the largest component
+        candidate = max(range(number_of_vertices), key=degree, default=0)
+        while len(landmarks) < min(number_of_landmarks, number_of_vertices):
+            landmarks.append(candidate)
+            from_landmark.append(single_source_distances(out_offsets, frozen_graph.get_out_targets,
+                                                         frozen_graph.get_out_costs, candidate, number_of_vertices))
+            to_landmark.append(single_source_distances(in_offsets, frozen_graph.get_in_sources,
+                                                       frozen_graph.get_in_costs, candidate, number_of_vertices))
+            # the next landmark is the vertex farthest from all the current ones among those connected to them;
+            # vertices no landmark is connected to would give no bounds at all
+            best = -1.0
+            for slot in range(number_of_vertices):
+                distance = min(from_landmark[-1][slot], to_landmark[-1][slot])
+                if distance < closest[slot]:
+                    closest[slot] = distance
+                if best < closest[slot] < inf and slot not in landmarks:
+                    best = closest[slot]
+                    candidate = slot
+            if best < 0:
+                # every vertex connected to the landmarks is a landmark: the next one is taken from the vertices
+                # they don't reach, again the one with the most edges
+                unreached = [slot for slot in range(number_of_vertices)
+                             if closest[slot] == inf and slot not in landmarks]
+                if not unreached:
+                    break
+                candidate = max(unreached, key=degree)
+
+        return LandmarkIndex(landmarks, from_landmark, to_landmark, graph_fingerprint(frozen_graph),
+                             number_of_landmarks)
+
+    def save(self, file_name):
+        """
+        Writes the index to a file
+        :raises GraphException if the file can't be written
+        """
+        number_of_vertices = len(self.__from_landmark[0]) if self.__landmarks else 0
+        try:
+            with open(file_name, "wb") as f:
+                f.write(LANDMARK_HEADER.pack(LANDMARK_MAGIC, LANDMARK_VERSION, len(self.__landmarks),
+                                             number_of_vertices, self.__fingerprint, self.__requested_landmarks))
+                self.__landmarks.tofile(f)
+                for from_distances, to_distances in zip(self.__from_landmark, self.__to_landmark):
+                    from_distances.tofile(f)
+                    to_distances.tofile(f)
+        except IOError:
+            raise GraphException("Error writing landmark file!\n")
+
+    @staticmethod
+    def load(file_name):
+        """
+        Reads an index from a file
+        :return: LandmarkIndex
+        :raises GraphException if the file can't be read or is not a landmark file
+        """
+        try:
+            with open(file_name, "rb") as f:
+                header = f.read(LANDMARK_HEADER.size)
+                if len(header) != LANDMARK_HEADER.size:
+                    raise GraphException("Invalid landmark file!\n")
+                magic, version, number_of_landmarks, number_of_vertices, fingerprint, requested_landmarks = \
+                    LANDMARK_HEADER.unpack(header)
+                if magic != LANDMARK_MAGIC or version != LANDMARK_VERSION:
+                    raise GraphException("Invalid landmark file!\n")
+                landmarks = array("q")
+                landmarks.fromfile(f, number_of_landmarks)
+                from_landmark = []
+                to_landmark = []
+                for index in range(number_of_landmarks):
+                    from_landmark.append(array("d"))
+                    from_landmark[-1].fromfile(f, number_of_vertices)
+                    to_landmark.append(array("d"))
+                    to_landmark[-1].fromfile(f, number_of_vertices)
+        except (IOError, EOFError):
+            raise GraphException("Error reading landmark file!\n")
+
+        return LandmarkIndex(landmarks, from_landmark, to_landmark, fingerprint, requested_landmarks)
+
+    def find_path(self, frozen_graph, start_vertex, end_vertex):
+        """
+        Finds a lowest cost walk with the A* algorithm guided by the landmark lower bounds
+        :param frozen_graph: the FrozenDirectedGraph the index was built on
+        :param start_vertex: starting vertex of path
+        :param end_vertex: ending vertex of path
+        :return: the path and its cost
+        :raises GraphException if there is no walk between the vertices or they are invalid
+        """
+        start_slot = frozen_graph.index_of(start_vertex)
+        end_slot = frozen_graph.index_of(end_vertex)
+        offsets = frozen_graph.get_out_offsets
+        targets = frozen_graph.get_out_targets
+        costs = frozen_graph.get_out_costs
+        # every landmark gives two bounds: d(v, L) - d(t, L) and d(L, t) - d(L, v); only the ones that are the
+        # tightest at start_vertex are used, as evaluating all of them for every vertex costs more than it saves
+        terms = []
+        for from_distances, to_distances in zip(self.__from_landmark, self.__to_landmark):
+            to_end = to_distances[end_slot]
+            from_end = from_distances[end_slot]
+            terms.append((bound_at(to_distances[start_slot], to_end), to_distances, to_end, 1))
+            terms.append((bound_at(from_end, from_distances[start_slot]), from_distances, from_end, -1))
+        terms.sort(key=lambda term: term[0], reverse=True)
+        terms = [(distances, end_distance, sign) for bound, distances, end_distance, sign in terms[:ACTIVE_BOUNDS]]
+        estimates = {}
+
+        def lower_bound(slot):
+            best = estimates.get(slot)
+            if best is None:
+                best = 0
+                for distances, end_distance, sign in terms:
+                    bound = bound_at(distances[slot], end_distance) if sign == 1 else \
+                        bound_at(end_distance, distances[slot])
+                    if bound > best:
+                        best = bound
+                estimates[slot] = best
+            return best
+
+        dist = {start_slot: 0}
+        parent = {}
+        settled = set()
+        heap = [(lower_bound(start_slot), 0, start_slot)]
+        while heap:
+            key, distance, slot = heappop(heap)
+            if slot in settled:
+                continue
+            settled.add(slot)
+            if slot == end_slot:
+                break
+            for position in range(offsets[slot], offsets[slot + 1]):
+                neighbor = targets[position]
+                new_distance = distance + costs[position]
+                if neighbor not in settled and new_distance < dist.get(neighbor, inf):
+                    estimate = lower_bound(neighbor)
+                    # the neighbor can't reach end_vertex
+                    if estimate == inf:
+                        continue
+                    dist[neighbor] = new_distance
+                    parent[neighbor] = slot
+                    heappush(heap, (new_distance + estimate, new_distance, neighbor))
+
+        if end_slot not in settled:
+            raise GraphException("No walk!")
+
+        path = [end_slot]
+        while path[-1] != start_slot:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return [frozen_graph.vertex_at(slot) for slot in path], dist[end_slot]
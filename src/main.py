@@ -1,5 +1,22 @@
 from UI import UI
+from scriptRunner import ScriptRunner
+from itertools import chain
+import argparse
+import sys
 
 if __name__ == "__main__":
-    ui = UI("graph1k.txt")
-    ui.start()
+    parser = argparse.ArgumentParser(description="Graph algorithms app")
+    parser.add_argument("--graph", help="graph file loaded by the menu (graph1k.txt by default), or before the script")
+    parser.add_argument("--script", help="run the commands of this file headlessly (\"-\" for stdin), writing one "
+                                         "JSON line per command to stdout, instead of starting the menu")
+    args = parser.parse_args()
+
+    if args.script is None:
+        ui = UI(args.graph if args.graph is not None else "graph1k.txt")
+        ui.start()
+    else:
+        preload = [] if args.graph is None else ["load " + args.graph]
+        script = sys.stdin if args.script == "-" else open(args.script)
+        with script:
+            failed = ScriptRunner().run(chain(preload, script), sys.stdout)
+        sys.exit(1 if failed else 0)
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+import sys
+
+# default memory cap of a cache, in bytes
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# size of a cost of a tree (an int outside the small int cache), which sys.getsizeof of the dictionary doesn't
+# include; the successors need no such charge, as they are the vertex objects of the graph itself
+VALUE_BYTES = sys.getsizeof(1 << 30)
+
+
+class ShortestPathCache:
+    """
+    LRU cache of backwards shortest path trees, keyed by the end vertex of the walks.
+    Every tree is tagged with the version of the graph it was computed on; when the graph is mutated its version
+    changes and all the cached trees are dropped on the next access.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.__max_bytes = max_bytes
+        self.__trees = OrderedDict()
+        self.__version = None
+        self.__size = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__invalidations = 0
+
+    @property
+    def get_statistics(self):
+        """
+        :return: dictionary with the hits, misses, evictions, invalidations, number of cached trees and their size
+        """
+        return {
+            "hits": self.__hits,
+            "misses": self.__misses,
+            "evictions": self.__evictions,
+            "invalidations": self.__invalidations,
+            "entries": len(self.__trees),
+            "bytes": self.__size,
+            "max_bytes": self.__max_bytes
+        }
+
+    def clear(self):
+        """
+        Drops all the cached trees
+        """
+        self.__trees.clear()
+        self.__size = 0
+
+    def __check_version(self, version):
+        """
+        Drops all the cached trees if they were computed on another version of the graph
+        """
+        if version != self.__version:
+            if self.__trees:
+                self.__invalidations += 1
+            self.clear()
+            self.__version = version
+
+    def get(self, end_vertex, version):
+        """
+        :param end_vertex: end vertex of the walks
+        :param version: current version of the graph
+        :return: the cached (dist, next) tree of the walks ending in end_vertex, None if it isn't cached
+        """
+        self.__check_version(version)
+        entry = self.__trees.get(end_vertex)
+        if entry is None:
+            self.__misses += 1
+            return None
+        self.__trees.move_to_end(end_vertex)
+        self.__hits += 1
+        return entry[0], entry[1]
+
+    def put(self, end_vertex, version, dist, next):
+        """
+        Caches the tree of the walks ending in end_vertex, evicting the least recently used trees if needed
+        :param end_vertex: end vertex of the walks
+        :param version: version of the graph the tree was computed on
+        :param dist: dictionary with the cost of the walk from every vertex to end_vertex
+        :param next: dictionary with the successor of every vertex on its walk
+        """
+        self.__check_version(version)
+        size = sys.getsizeof(dist) + sys.getsizeof(next) + len(dist) * VALUE_BYTES
+        if size > self.__max_bytes:
+            return
+        if end_vertex in self.__trees:
+            self.__size -= self.__trees.pop(end_vertex)[2]
+        while self.__size + size > self.__max_bytes:
+            self.__size -= self.__trees.popitem(last=False)[1][2]
+            self.__evictions += 1
+        self.__trees[end_vertex] = (dist, next, size)
+        self.__size += size
@@ -0,0 +1,289 @@
+from directedGraph import *
+from graphIO import load_text_graph, load_binary_graph, is_binary_graph_file, write_text_graph, save_binary_graph
+from graphGenerators import gnm_graph
+from math import inf
+from time import perf_counter
+import json
+
+# commands that change or replace the graph
+MUTATING_COMMANDS = {"load", "generate", "add_vertex", "remove_vertex", "add_edge", "remove_edge", "update_cost"}
+# arguments that are passed on as they are, with their accepted types
+STRING_ARGUMENTS = {"file", "method"}
+FLAG_ARGUMENTS = {"binary", "use_numpy"}
+# arguments that must be integers (strings holding integers in the text form); seed and max_workers may be null
+INTEGER_ARGUMENTS = {"vertices", "edges", "seed", "vertex", "start", "end", "cost", "max_workers"}
+OPTIONAL_ARGUMENTS = {"seed", "max_workers", "use_numpy"}
+
+
+def json_number(value):
+    """
+    :return: the value, or None for the infinite costs JSON can't represent
+    """
+    return None if value in (inf, -inf) else value
+
+
+class ScriptRunner:
+    """
+    Headless command runner: reads one command per line and writes one JSON object per command.
+    A command is either a JSON object, such as {"command": "path", "start": 0, "end": 5}, or the command name
+    followed by its arguments, such as "path 0 5". The graph stays loaded across commands.
+    Every result has "ok" (and "error" when false), "command", "elapsed" and, if the command had one, its "id".
+    """
+    def __init__(self, graph=None):
+        self.__graph = graph if graph is not None else DirectedGraph(0)
+        # command name -> (handler, names of the positional arguments of the text form)
+        self.__commands = {
+            "load": (self.load, ["file"]),
+            "save": (self.save, ["file"]),
+            "generate": (self.generate, ["vertices", "edges", "seed"]),
+            "info": (self.info, []),
+            "is_edge": (self.is_edge, ["start", "end"]),
+            "degree": (self.degree, ["vertex"]),
+            "add_vertex": (self.add_vertex, ["vertex"]),
+            "remove_vertex": (self.remove_vertex, ["vertex"]),
+            "add_edge": (self.add_edge, ["start", "end", "cost"]),
+            "remove_edge": (self.remove_edge, ["start", "end"]),
+            "update_cost": (self.update_cost, ["start", "end", "cost"]),
+            "path": (self.path, ["start", "end", "method"]),
+            "paths": (self.paths, []),
+            "dag": (self.dag, ["method"]),
+            "highest": (self.highest, ["start", "end"]),
+            "negpath": (self.negpath, ["start", "end"]),
+            "components": (self.components, []),
+        }
+
+    @property
+    def get_graph(self):
+        """
+        :return: the graph the commands run on
+        """
+        return self.__graph
+
+    def load(self, file):
+        if is_binary_graph_file(file):
+            self.__graph = DirectedGraph.from_frozen(load_binary_graph(file))
+        else:
+            self.__graph = load_text_graph(file)
+        return self.info()
+
+    def save(self, file, binary=False):
+        if binary:
+            save_binary_graph(self.__graph, file)
+        else:
+            write_text_graph(self.__graph, file)
+        return {}
+
+    def generate(self, vertices, edges, seed=None):
+        self.__graph = gnm_graph(int(vertices), int(edges), None if seed is None else int(seed))
+        return self.info()
+
+    def info(self):
+        return {"vertices": self.__graph.get_no_of_vertices, "edges": self.__graph.get_no_of_edges}
+
+    def is_edge(self, start, end):
+        if not self.__graph.is_vertex(int(start)) or not self.__graph.is_vertex(int(end)):
+            raise GraphException("Nonexistent vertex!\n")
+        return {"edge": self.__graph.is_edge(int(start), int(end))}
+
+    def degree(self, vertex):
+        return {"in": self.__graph.get_in_degree(int(vertex)), "out": self.__graph.get_out_degree(int(vertex))}
+
+    def add_vertex(self, vertex):
+        self.__graph.add_vertex(int(vertex))
+        return {}
+
+    def remove_vertex(self, vertex):
+        self.__graph.remove_vertex(int(vertex))
+        return {}
+
+    def add_edge(self, start, end, cost):
+        self.__graph.add_edge(int(start), int(end), int(cost))
+        return {}
+
+    def remove_edge(self, start, end):
+        self.__graph.remove_edge(int(start), int(end))
+        return {}
+
+    def update_cost(self, start, end, cost):
+        self.__graph.update_cost(int(start), int(end), int(cost))
+        return {}
+
+    def path(self, start, end, method="backwards"):
+        start, end = int(start), int(end)
+        if not self.__graph.is_vertex(start) or not self.__graph.is_vertex(end):
+            raise GraphException("Nonexistent vertex!\n")
+        try:
+            path, cost = self.__graph.get_lowest_cost_path(start, end, method)
+        except GraphException as error:
+            if str(error) != "No walk!":
+                raise
+            return {"path": None, "cost": None}
+        return {"path": path, "cost": cost}
+
+    def paths(self, pairs, max_workers=None):
+        results = self.__graph.get_lowest_cost_paths([(int(start), int(end)) for start, end in pairs], max_workers)
+        return {"results": [{"path": None, "cost": None} if result is None else {"path": result[0], "cost": result[1]}
+                            for result in results]}
+
+    def dag(self, method="dfs"):
+        is_dag, vertices = self.__graph.topological_sort(method)
+        if is_dag:
+            return {"dag": True, "order": vertices}
+        return {"dag": False, "cycle": vertices}
+
+    def highest(self, start, end):
+        start, end = int(start), int(end)
+        if not self.__graph.is_vertex(start) or not self.__graph.is_vertex(end):
+            raise GraphException("Nonexistent vertex!\n")
+        is_dag, vertices = self.__graph.topological_sort()
+        if not is_dag:
+            raise GraphException("Graph is not a DAG!\n")
+        cost, prev = self.__graph.highest_cost_path(vertices, start, end)
+        if cost == -inf:
+            return {"path": None, "cost": None}
+        path = [end]
+        while path[-1] != start:
+            path.append(prev[path[-1]])
+        path.reverse()
+        return {"path": path, "cost": cost}
+
+    def negpath(self, start, end):
+        start, end = int(start), int(end)
+        if not self.__graph.is_vertex(end):
+            raise GraphException("Nonexistent vertex!\n")
+        distances, prev, cycle = self.__graph.spfa(start)
+        if cycle is not None:
+            return {"path": None, "cost": None, "negative_cycle": cycle}
+        if end not in distances:
+            return {"path": None, "cost": None}
+        path = [end]
+        while path[-1] != start:
+            path.append(prev[path[-1]])
+        path.reverse()
+        return {"path": path, "cost": json_number(distances[end])}
+
+    def components(self, use_numpy=None):
+        components = self.__graph.get_weakly_connected_components(use_numpy)
+        return {"count": len(components), "components": components}
+
+    def parse(self, line):
+        """
+        :param line: a command, in the JSON or in the text form
+        :return: the command name, its keyword arguments and its id (None if it has none)
+        :raises GraphException if the command is malformed or unknown
+        """
+        if line.startswith("{"):
+            try:
+                arguments = json.loads(line)
+            except ValueError:
+                raise GraphException("Invalid JSON command!\n")
+            if not isinstance(arguments, dict) or "command" not in arguments:
+                raise GraphException("Invalid JSON command!\n")
+            name = arguments.pop("command")
+            id = arguments.pop("id", None)
+        else:
+            tokens = line.split()
+            name = tokens[0]
+            id = None
+            if name not in self.__commands:
+                raise GraphException("Unknown command!\n")
+            names = self.__commands[name][1]
+            if len(tokens) - 1 > len(names):
+                raise GraphException("Too many arguments!\n")
+            arguments = dict(zip(names, tokens[1:]))
+        if name not in self.__commands:
+            raise GraphException("Unknown command!\n")
+        return name, arguments, id
+
+    @staticmethod
+    def check_integer(value, name):
+        """
+        :return: the value as an int
+        :raises GraphException if the value is not an integer or a string holding one
+        """
+        if isinstance(value, str):
+            try:
+                return int(value)
+            except ValueError:
+                pass
+        elif isinstance(value, int) and not isinstance(value, bool):
+            return value
+        raise GraphException("Invalid argument %s!\n" % name)
+
+    def check_arguments(self, arguments):
+        """
+        Checks the types of the arguments of a command before it is run, converting the integer ones to int
+        :param arguments: keyword arguments of the command
+        :return: the checked arguments
+        :raises GraphException if an argument has the wrong type
+        """
+        checked = {}
+        for name, value in arguments.items():
+            if value is None and name in OPTIONAL_ARGUMENTS:
+                checked[name] = value
+            elif name in STRING_ARGUMENTS:
+                if not isinstance(value, str):
+                    raise GraphException("Invalid argument %s!\n" % name)
+                checked[name] = value
+            elif name in FLAG_ARGUMENTS:
+                if not isinstance(value, bool):
+                    raise GraphException("Invalid argument %s!\n" % name)
+                checked[name] = value
+            elif name in INTEGER_ARGUMENTS:
+                checked[name] = self.check_integer(value, name)
+            elif name == "pairs":
+                if not isinstance(value, list) or \
+                        not all(isinstance(pair, list) and len(pair) == 2 for pair in value):
+                    raise GraphException("Invalid argument pairs!\n")
+                checked[name] = [(self.check_integer(start, name), self.check_integer(end, name))
+                                 for start, end in value]
+            else:
+                # unknown arguments are rejected by the call to the handler
+                checked[name] = value
+        return checked
+
+    def execute(self, line):
+        """
+        Runs a single command
+        :param line: a command, in the JSON or in the text form
+        :return: dictionary with the result of the command
+        """
+        start = perf_counter()
+        result = {"ok": True}
+        try:
+            name, arguments, id = self.parse(line)
+            if id is not None:
+                result["id"] = id
+            result["command"] = name
+            result.update(self.__commands[name][0](**self.check_arguments(arguments)))
+        except GraphException as error:
+            result["ok"] = False
+            result["error"] = str(error).strip()
+        except (TypeError, ValueError) as error:
+            result["ok"] = False
+            result["error"] = "Invalid arguments: %s" % error
+        except Exception as error:
+            # a failing command must not stop the commands after it
+            result["ok"] = False
+            result["error"] = "%s: %s" % (type(error).__name__, error)
+        result["elapsed"] = perf_counter() - start
+        return result
+
+    def run(self, input_stream, output_stream):
+        """
+        Runs every command of the input stream, writing one JSON line per command to the output stream;
+        empty lines and lines starting with "#" are skipped
+        :return: number of failed commands
+        """
+        failed = 0
+        for line in input_stream:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            result = self.execute(line)
+            failed += not result["ok"]
+            output_stream.write(json.dumps(result) + "\n")
+            output_stream.flush()
+
+        return failed
+
@@ -0,0 +1,271 @@
+from scriptRunner import ScriptRunner, MUTATING_COMMANDS
+from exceptions import *
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import argparse
+import asyncio
+import json
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# number of requests of a connection that can be in flight before the server stops reading from it
+PIPELINE_DEPTH = 64
+# longest request line accepted, so that large "paths" batches fit in one line
+MAX_LINE_BYTES = 1 << 24
+
+
+class ReadWriteLock:
+    """
+    First-come first-served read/write lock for asyncio tasks: any number of readers or a single writer hold it.
+    Requests are granted in the order acquire was called, so a write is never starved by a stream of reads, and a
+    read queued after a write sees that write.
+    """
+    def __init__(self):
+        self.__readers = 0
+        self.__writer = False
+        # (future, write) of every waiting request, in arrival order
+        self.__waiters = deque()
+
+    @property
+    def get_readers(self):
+        """
+        :return: number of readers holding the lock
+        """
+        return self.__readers
+
+    @property
+    def get_writer(self):
+        """
+        :return: true if a writer holds the lock, false otherwise
+        """
+        return self.__writer
+
+    def acquire(self, write):
+        """
+        Queues a request for the lock; the request takes its place in the queue right away, before it is awaited
+        :param write: true for exclusive (write) access, false for shared (read) access
+        :return: future done when the lock is granted; if it is cancelled before that, the request is dropped
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.__waiters.append((future, write))
+        self.__grant()
+        return future
+
+    def release(self, write):
+        """
+        Releases a granted request
+        :param write: the write flag the lock was acquired with
+        """
+        if write:
+            self.__writer = False
+        else:
+            self.__readers -= 1
+        self.__grant()
+
+    def __grant(self):
+        while self.__waiters:
+            future, write = self.__waiters[0]
+            if future.done():
+                self.__waiters.popleft()
+                continue
+            if self.__writer or (write and self.__readers > 0):
+                return
+            self.__waiters.popleft()
+            if write:
+                self.__writer = True
+            else:
+                self.__readers += 1
+            future.set_result(None)
+            if write:
+                return
+
+
+class GraphServer:
+    """
+    Asyncio TCP server keeping one graph in memory and answering the commands of scriptRunner.ScriptRunner,
+    one JSON line per request and per response. A connection can pipeline requests: they run concurrently and
+    the responses come back in the order of the requests. The commands run on a thread pool, under the read lock
+    for queries and the write lock for the commands changing the graph, so the event loop keeps accepting
+    connections and requests while an algorithm runs.
+    """
+    def __init__(self, graph=None, max_workers=None):
+        self.__runner = ScriptRunner(graph)
+        self.__lock = ReadWriteLock()
+        self.__executor = ThreadPoolExecutor(max_workers)
+        self.__server = None
+        # writer -> handler task of every open connection
+        self.__connections = {}
+
+    @property
+    def get_runner(self):
+        """
+        :return: the ScriptRunner holding the graph
+        """
+        return self.__runner
+
+    @property
+    def get_port(self):
+        """
+        :return: the port the server listens on, None if it is not started
+        """
+        if self.__server is None:
+            return None
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts listening; port 0 picks a free port (see get_port)
+        """
+        self.__server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE_BYTES)
+
+    async def serve_forever(self):
+        async with self.__server:
+            await self.__server.serve_forever()
+
+    async def close(self):
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+        # closing the connections ends their handlers as if the clients had disconnected
+        handlers = list(self.__connections.values())
+        for writer in self.__connections:
+            writer.close()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        self.__executor.shutdown()
+
+    async def handle_connection(self, reader, writer):
+        responses = asyncio.Queue(PIPELINE_DEPTH)
+        sender = asyncio.create_task(self.__send_responses(responses, writer))
+        self.__connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as error:
+                    # the last line may have no newline
+                    line = error.partial
+                except asyncio.LimitOverrunError as error:
+                    await self.__skip_line(reader, error.consumed)
+                    await responses.put((None, self.__failed("Request line too long!")))
+                    continue
+                if not line:
+                    break
+                try:
+                    line = line.decode().strip()
+                except UnicodeDecodeError:
+                    await responses.put((None, self.__failed("Invalid request encoding!")))
+                    continue
+                if not line:
+                    continue
+                # the lock is requested here, in the order the requests arrive, and awaited by the request's task
+                write = self.__is_mutating(line)
+                granted = self.__lock.acquire(write)
+                await responses.put((line, asyncio.create_task(self.__execute(line, write, granted))))
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            # the server is shutting down
+            sender.cancel()
+            writer.close()
+            raise
+        finally:
+            del self.__connections[writer]
+        await responses.put(None)
+        await sender
+        writer.close()
+
+    @staticmethod
+    async def __skip_line(reader, consumed):
+        """
+        Discards the rest of a line longer than the limit of the reader
+        :param consumed: number of bytes of the line already buffered (LimitOverrunError.consumed)
+        """
+        while True:
+            await reader.readexactly(consumed)
+            try:
+                await reader.readuntil(b"\n")
+                return
+            except asyncio.IncompleteReadError:
+                return
+            except asyncio.LimitOverrunError as error:
+                consumed = error.consumed
+
+    @staticmethod
+    def __failed(error):
+        """
+        :return: future already holding the result of a request that failed before it could run
+        """
+        future = asyncio.get_running_loop().create_future()
+        future.set_result({"ok": False, "error": error})
+        return future
+
+    async def __send_responses(self, responses, writer):
+        closed = False
+        while True:
+            item = await responses.get()
+            if item is None:
+                return
+            line, task = item
+            try:
+                result = await task
+            except Exception as error:
+                # the request still gets its response line, and the requests after it are still answered
+                result = {"ok": False, "error": "%s: %s" % (type(error).__name__, error)}
+                try:
+                    name, arguments, id = self.__runner.parse(line)
+                    result["command"] = name
+                    if id is not None:
+                        result["id"] = id
+                except GraphException:
+                    pass
+            if closed:
+                continue
+            try:
+                writer.write((json.dumps(result) + "\n").encode())
+                await writer.drain()
+            except ConnectionError:
+                # the client is gone: the queued requests still run, so they release the lock
+                closed = True
+
+    def __is_mutating(self, line):
+        try:
+            return self.__runner.parse(line)[0] in MUTATING_COMMANDS
+        except GraphException:
+            return False
+
+    async def __execute(self, line, write, granted):
+        try:
+            await granted
+            return await asyncio.get_running_loop().run_in_executor(self.__executor, self.__runner.execute, line)
+        finally:
+            if granted.done() and not granted.cancelled():
+                self.__lock.release(write)
+            else:
+                granted.cancel()
+
+
+async def serve(graph_file=None, host=DEFAULT_HOST, port=DEFAULT_PORT, max_workers=None):
+    server = GraphServer(max_workers=max_workers)
+    if graph_file is not None:
+        result = server.get_runner.execute("load " + graph_file)
+        if not result["ok"]:
+            raise GraphException(result["error"])
+    await server.start(host, port)
+    print("Serving on %s:%d" % (host, server.get_port), flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Graph query server: one JSON command per line over TCP")
+    parser.add_argument("--graph", default="graph1k.txt", help="graph file loaded at startup")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="number of worker threads")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.graph, args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
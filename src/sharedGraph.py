@@ -0,0 +1,93 @@
+from exceptions import *
+from frozenGraph import FrozenDirectedGraph
+from multiprocessing import shared_memory
+import struct
+
+# layout of a shared graph: header, then the arrays of the frozen graph (see FrozenDirectedGraph.from_buffer)
+# cost typecode (b"q" or b"d"), number of vertices, number of edges
+SHARED_HEADER = struct.Struct("=c7xqq")
+
+
+class SharedGraph:
+    """
+    Frozen graph stored in a block of shared memory, so that several processes run their algorithms on the same
+    arrays instead of each holding its own copy. The publishing process creates the block with publish and the
+    others attach to it by name with attach; the FrozenDirectedGraph of get_graph is a view of the block.
+    """
+    def __init__(self, memory, owner):
+        self.__memory = memory
+        self.__owner = owner
+        cost_type, number_of_vertices, number_of_edges = SHARED_HEADER.unpack_from(memory.buf)
+        self.__graph = FrozenDirectedGraph.from_buffer(memory.buf[SHARED_HEADER.size:], number_of_vertices,
+                                                       number_of_edges, cost_type.decode())
+
+    @staticmethod
+    def publish(graph):
+        """
+        Copies a graph to a new block of shared memory
+        :param graph: DirectedGraph or FrozenDirectedGraph
+        :return: SharedGraph owning the block; it must be closed to free the block
+        """
+        if not isinstance(graph, FrozenDirectedGraph):
+            graph = graph.freeze()
+        size = SHARED_HEADER.size + FrozenDirectedGraph.buffer_size(graph.get_no_of_vertices, graph.get_no_of_edges)
+        memory = shared_memory.SharedMemory(create=True, size=size)
+        buffer = memory.buf
+        SHARED_HEADER.pack_into(buffer, 0, graph.get_cost_type.encode(), graph.get_no_of_vertices,
+                                graph.get_no_of_edges)
+        offset = SHARED_HEADER.size
+        for values in graph.get_arrays:
+            values = memoryview(values).cast("B")
+            buffer[offset:offset + len(values)] = values
+            offset += len(values)
+        del buffer
+
+        return SharedGraph(memory, True)
+
+    @staticmethod
+    def attach(name):
+        """
+        Attaches to a graph published by another process
+        :param name: name of the block (see get_name)
+        :return: SharedGraph viewing the block
+        :raises GraphException if there is no such block
+        """
+        try:
+            memory = shared_memory.SharedMemory(name)
+        except FileNotFoundError:
+            raise GraphException("Nonexistent shared graph!\n")
+        return SharedGraph(memory, False)
+
+    @property
+    def get_name(self):
+        """
+        :return: name of the block of shared memory, which other processes pass to attach
+        """
+        return self.__memory.name
+
+    @property
+    def get_graph(self):
+        """
+        :return: FrozenDirectedGraph whose arrays are views of the shared block
+        """
+        return self.__graph
+
+    def close(self):
+        """
+        Detaches from the block, which is also freed if this process published it; get_graph can't be used after
+        """
+        if self.__graph is None:
+            return
+        # the views of the block must be released before the block can be closed
+        for values in self.__graph.get_arrays:
+            values.release()
+        self.__graph = None
+        self.__memory.close()
+        if self.__owner:
+            self.__memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
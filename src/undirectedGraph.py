@@ -1,15 +1,30 @@
 from exceptions import *
-import copy
+from disjointSet import ConnectedComponents
+from bfsEngine import breadth_first_tree, connected_components
+from instrumentation import Instrumentation
+from costViews import UndirectedCostView
 
 
 class UndirectedGraph:
     def __init__(self, number_of_vertices):
         self.__no_of_vertices = number_of_vertices
         self.__neighbors = {}
-        self.__costs = {}
-
+        self.__no_of_edges = 0
+        # copy-on-write state: copy_graph shares all the dictionaries with the copy; the outer dictionaries are
+        # copied on the first mutation and the neighbors of a vertex only when they are modified
+        self.__shared = False
+        self.__copy_on_write = False
+        self.__owned = set()
+        # connected components, kept up to date by every mutation (None in a copy, until they are first needed)
+        self.__components = ConnectedComponents(range(self.__no_of_vertices))
+        # opt-in counters of the algorithm runs
+        self.__instrumentation = Instrumentation()
+
+        # the neighbors of every vertex are kept as insertion-ordered dictionaries mapping every neighbor to the cost
+        # of the edge between them, so membership, cost lookup, insertion and removal are O(1) and iteration order
+        # stays deterministic; the cost of an edge is stored symmetrically, in the dictionaries of both endpoints
         for vertex in range(self.__no_of_vertices):
-            self.__neighbors[vertex] = []
+            self.__neighbors[vertex] = {}
 
     @property
     def get_no_of_vertices(self):
@@ -23,7 +38,28 @@ class UndirectedGraph:
         """
         :return: number of edges of the graph
         """
-        return len(self.__costs.keys())
+        return self.__no_of_edges
+
+    @property
+    def get_no_of_components(self):
+        """
+        :return: number of connected components of the graph
+        """
+        return self.__get_components().get_count
+
+    @property
+    def get_instrumentation(self):
+        """
+        :return: the Instrumentation recording the algorithm runs of the graph
+        """
+        return self.__instrumentation
+
+    @property
+    def get_last_stats(self):
+        """
+        :return: the AlgorithmStats of the last instrumented algorithm run, None if there is none
+        """
+        return self.__instrumentation.get_last
 
     @property
     def get_neighbors(self):
@@ -35,9 +71,10 @@ class UndirectedGraph:
     @property
     def get_costs(self):
         """
-        :return: costs of the graph
+        :return: costs of the graph, as a read-only mapping (start_vertex, end_vertex) -> cost, in which every edge
+        is listed once and can be looked up in both directions
         """
-        return self.__costs
+        return UndirectedCostView(self)
 
     def get_cost_of_edge(self, start_vertex, end_vertex):
         """
@@ -50,10 +87,7 @@ class UndirectedGraph:
         if self.is_edge(start_vertex, end_vertex) is False:
             raise GraphException("Nonexistent edge!\n")
 
-        if (start_vertex, end_vertex) in self.__costs.keys():
-            return self.__costs[(start_vertex, end_vertex)]
-        else:
-            return self.__costs[(end_vertex, start_vertex)]
+        return self.__neighbors[start_vertex][end_vertex]
 
     def get_isolated_vertices(self):
         """
@@ -85,9 +119,9 @@ class UndirectedGraph:
 
     def parse_all_edges(self):
         """
-        :return: a list containing all keys = edges
+        :return: a list containing all edges, each listed once
         """
-        return list(self.__costs.keys())
+        return list(UndirectedCostView(self))
 
     def parse_neighbors(self, vertex):
         """
@@ -100,6 +134,18 @@ class UndirectedGraph:
         except KeyError:
             raise GraphException("Nonexistent vertex!\n")
 
+    def parse_edges(self, vertex):
+        """
+        :param vertex: vertex whose edges are searched
+        :return: live read-only view of the (neighbor, cost) pairs of the edges of given vertex, which must not be
+        iterated while the graph is modified
+        :raises GraphException: nonexistent vertex
+        """
+        try:
+            return self.__neighbors[vertex].items()
+        except KeyError:
+            raise GraphException("Nonexistent vertex!\n")
+
     def is_edge(self, start_vertex, end_vertex):
         """
         Checks if there is an edge between the 2 given vertices
@@ -128,9 +174,12 @@ class UndirectedGraph:
         if self.is_edge(start_vertex, end_vertex):
             raise GraphException("Edge already exists in the graph!\n")
 
-        self.__neighbors[start_vertex].append(end_vertex)
-        self.__neighbors[end_vertex].append(start_vertex)
-        self.__costs[(start_vertex, end_vertex)] = cost
+        self.__unshare()
+        self.__writable_neighbors(start_vertex)[end_vertex] = cost
+        self.__writable_neighbors(end_vertex)[start_vertex] = cost
+        self.__no_of_edges += 1
+        if self.__components is not None:
+            self.__components.union(start_vertex, end_vertex)
 
     def remove_edge(self, start_vertex, end_vertex):
         """
@@ -145,13 +194,12 @@ class UndirectedGraph:
         if not self.is_edge(start_vertex, end_vertex):
             raise GraphException("Edge doesn't exist!\n")
 
-        self.__neighbors[start_vertex].remove(end_vertex)
-        self.__neighbors[end_vertex].remove(start_vertex)
-
-        if (start_vertex, end_vertex) in self.__costs.keys():
-            del self.__costs[(start_vertex, end_vertex)]
-        else:
-            del self.__costs[(end_vertex, start_vertex)]
+        self.__unshare()
+        del self.__writable_neighbors(start_vertex)[end_vertex]
+        del self.__writable_neighbors(end_vertex)[start_vertex]
+        self.__no_of_edges -= 1
+        if self.__components is not None:
+            self.__components.edge_removed(start_vertex, end_vertex)
 
     def add_vertex(self, new_vertex):
         """
@@ -160,13 +208,18 @@ class UndirectedGraph:
         :raises GraphException if vertex already exists in the graph
         """
         err = ""
-        if new_vertex in self.__neighbors.keys():
+        if new_vertex in self.__neighbors:
             err += "Vertex already exists in the graph!\n"
 
         if len(err) > 0:
             raise GraphException(err)
 
-        self.__neighbors[new_vertex] = []
+        self.__unshare()
+        self.__neighbors[new_vertex] = {}
+        if self.__copy_on_write:
+            self.__owned.add(new_vertex)
+        if self.__components is not None:
+            self.__components.add(new_vertex)
         self.__no_of_vertices += 1
 
     def remove_vertex(self, vertex):
@@ -178,28 +231,57 @@ class UndirectedGraph:
         if vertex not in self.__neighbors.keys():
             raise GraphException("Nonexistent vertex!\n")
 
+        self.__unshare()
+        if self.__components is not None:
+            self.__components.vertex_removed(vertex, self.__neighbors[vertex])
         for start_vertex in self.__neighbors[vertex]:
-            self.__neighbors[start_vertex].remove(vertex)
-            if (start_vertex, vertex) in self.__costs.keys():
-                del self.__costs[(start_vertex, vertex)]
-            else:
-                del self.__costs[(vertex, start_vertex)]
+            del self.__writable_neighbors(start_vertex)[vertex]
+        self.__no_of_edges -= len(self.__neighbors[vertex])
 
         # remove vertex
         del self.__neighbors[vertex]
+        self.__owned.discard(vertex)
         self.__no_of_vertices -= 1
 
     def copy_graph(self):
         """
-        :return: deepcopy copy of current graph
+        Makes an O(1) copy-on-write snapshot of the graph: the copy shares all its dictionaries with the original,
+        and each of the 2 graphs copies a dictionary only before modifying it, so they stay independent
+        :return: copy of current graph
         """
-        graph_copy = UndirectedGraph(self.__no_of_vertices)
+        graph_copy = UndirectedGraph(0)
         graph_copy.__no_of_vertices = self.__no_of_vertices
-        graph_copy.__neighbors = copy.deepcopy(self.__neighbors)
-        graph_copy.__costs = copy.deepcopy(self.__costs)
+        graph_copy.__neighbors = self.__neighbors
+        graph_copy.__no_of_edges = self.__no_of_edges
+        graph_copy.__components = None
+
+        # from now on, neither graph owns any of the dictionaries
+        for graph in (self, graph_copy):
+            graph.__shared = True
+            graph.__copy_on_write = True
+            graph.__owned = set()
 
         return graph_copy
 
+    def __unshare(self):
+        """
+        Makes private shallow copies of the outer dictionaries if they are shared with another graph
+        """
+        if self.__shared:
+            self.__neighbors = dict(self.__neighbors)
+            self.__shared = False
+
+    def __writable_neighbors(self, vertex):
+        """
+        :return: the neighbors of the vertex, copied first if they may be shared with another graph
+        """
+        neighbors = self.__neighbors[vertex]
+        if self.__copy_on_write and vertex not in self.__owned:
+            neighbors = dict(neighbors)
+            self.__neighbors[vertex] = neighbors
+            self.__owned.add(vertex)
+        return neighbors
+
     def update_cost(self, start_vertex, end_vertex, new_cost):
         """
         Changes the cost of an edge (start_vertex, end_vertex) with given value
@@ -211,76 +293,112 @@ class UndirectedGraph:
         if self.is_edge(start_vertex, end_vertex) is False:
             raise GraphException("Nonexistent edge!\n")
 
-        if (start_vertex, end_vertex) in self.__costs.keys():
-            self.__costs[(start_vertex, end_vertex)] = new_cost
-        else:
-            self.__costs[(end_vertex, start_vertex)] = new_cost
+        self.__unshare()
+        self.__writable_neighbors(start_vertex)[end_vertex] = new_cost
+        self.__writable_neighbors(end_vertex)[start_vertex] = new_cost
 
     def iterable_edges(self):
         """
-        :return: returns the edges of a graph in iterable form
+        :return: returns the edges of a graph in iterable form, each edge listed once
         """
-        edges = []
-        for edge in self.__costs:
-            edges.append(edge)
-
-        return edges[:]
+        return list(UndirectedCostView(self))
 
     def iterable_costs(self):
         """
-        :return: returns the costs of a graph in iterable form
+        :return: returns the costs of a graph in iterable form, in the same order as iterable_edges
         """
-        costs = []
-        for cost in self.__costs:
-            costs.append(self.__costs[cost])
-
-        return costs[:]
+        neighbors = self.__neighbors
+        return [neighbors[start_vertex][end_vertex] for start_vertex, end_vertex in UndirectedCostView(self)]
 
     def breadth_first_search(self, source_vertex, is_visited):
         """
         Method that performs a breadth-first traversal of graph
-        :param is_visited: boolean list which is True for each vertex that has been visited and False otherwise
+        :param is_visited: set of the visited vertices, updated with the vertices reached by the traversal
         :param source_vertex: start vertex of graph traversal
         :return: list containing the connected component that starts from given vertex
+        :raises GraphException if vertex is invalid
         """
-        # list containing vertices of the found connected component
-        connected_component = []
+        stats = self.__instrumentation.start("breadth_first_search")
+        component = breadth_first_tree(self.__neighbors, source_vertex, is_visited, stats=stats)[0]
+        if stats is not None:
+            stats.finish()
+        return component
 
-        # list of all traversed vertices from the graph
-        queue = []
+    def breadth_first_tree(self, source_vertex, use_numpy=None):
+        """
+        Method that performs a breadth-first traversal of graph
+        :param source_vertex: start vertex of graph traversal
+        :param use_numpy: True, False, or None to use NumPy frontier arrays on large graphs when NumPy is installed
+        :return: list of the reached vertices in BFS order, dictionary with the level of every reached vertex and
+        dictionary with the parent of every reached vertex in the BFS tree (None for the source)
+        :raises GraphException if vertex is invalid
+        """
+        stats = self.__instrumentation.start("breadth_first_tree")
+        tree = breadth_first_tree(self.__neighbors, source_vertex, use_numpy=use_numpy, stats=stats)
+        if stats is not None:
+            stats.finish()
+        return tree
 
-        # mark source vertex as visited and add it to connected component
-        is_visited[source_vertex] = True
-        queue.append(source_vertex)
+    def get_all_connected_components(self, use_numpy=None):
+        """
+        Method that finds all the connected components in the given undirected graph
+        :param use_numpy: True, False, or None to use NumPy frontier arrays on large graphs when NumPy is installed
+        :return: a list of all the connected components
+        """
+        stats = self.__instrumentation.start("connected_components")
+        components = connected_components(self.__neighbors, use_numpy, stats)
+        if stats is not None:
+            stats.finish()
+        return components
 
-        # parse the queue until it's empty
-        while len(queue) > 0:
-            # pop first element from the queue
-            vertex = queue.pop(0)
-            # add first element to component
-            connected_component.append(vertex)
-            # parse all neighbors of current vertex
-            for neighbor in self.__neighbors[vertex]:
-                if is_visited[neighbor] is False:
-                    queue.append(neighbor)     # append neighbor to parsed vertices queue
-                    is_visited[neighbor] = True        # mark neighbor as visited
+    def enable_instrumentation(self):
+        """
+        Starts recording the counters and timings of every algorithm run
+        """
+        self.__instrumentation.enable()
 
-        return connected_component[:]
+    def disable_instrumentation(self):
+        """
+        Stops recording algorithm runs; the recorded ones are kept
+        """
+        self.__instrumentation.disable()
 
-    def get_all_connected_components(self):
+    def instrumented(self):
         """
-        Method that finds all the connected components in the given undirected graph
-        :return: a list of all the connected components
+        Context manager recording the algorithm runs of its block
+        :return: context manager giving the Instrumentation of the graph
+        """
+        return self.__instrumentation.session()
+
+    def __get_components(self):
+        """
+        :return: the connected components of the graph, built or brought up to date first if needed
         """
-        # list that holds all connected components of graph
-        connected_components = []
-        # list that holds all visited vertices
-        is_visited = [False] * (self.__no_of_vertices + 1)
+        if self.__components is None:
+            self.__components = ConnectedComponents(self.__neighbors, UndirectedCostView(self))
+        else:
+            self.__components.refresh(self.__neighbors)
+
+        return self.__components
 
-        for vertex in self.parse_all_vertices():
-            if is_visited[vertex] is False:
-                # call BFS algorithm for each vertex of graph
-                new_component = self.breadth_first_search(vertex, is_visited)
-                connected_components.append(new_component)
+    def same_component(self, first_vertex, second_vertex):
+        """
+        :return: true if the 2 vertices are in the same connected component, false otherwise
+        :raises GraphException if a vertex is invalid
+        """
+        if first_vertex not in self.__neighbors or second_vertex not in self.__neighbors:
+            raise GraphException("Nonexistent vertex!\n")
+
+        components = self.__get_components()
+        return components.find(first_vertex) == components.find(second_vertex)
+
+    def component_of(self, vertex):
+        """
+        :return: id of the connected component of the given vertex; 2 vertices are in the same component if and only if
+        they have the same id, which may change when the graph is modified
+        :raises GraphException if vertex is invalid
+        """
+        if vertex not in self.__neighbors:
+            raise GraphException("Nonexistent vertex!\n")
 
-        return connected_components
+        return self.__get_components().find(vertex)